@@ -0,0 +1,597 @@
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Data.DataHandler import load_grid
+from Data.DataHandler import fill_result
+from Data.DataHandler import save_grid_to_file
+from Data.Grid import Grid
+from Tasks.CNFs_Generation import generate_CNF_s
+from Tasks.CNFs_Generation import ENCODINGS
+from Tasks.Engines import solve_model
+from Tasks.Backtracking import back_tracking_SAT
+from Tasks.Backtracking import dpll_SAT
+from Tasks.Backtracking import new_search_stats
+from Tasks.BruteForce import brute_force_SAT
+from Tasks.Budget import make_budget
+from Tasks.Budget import BudgetExceeded
+from Tasks.Ordering import ORDERINGS
+from Tasks.Ordering import reorder_CNF_s
+from Tasks.Ordering import check_delay
+from Tasks.Engines import SOLUTIONS
+from Tasks.Engines import ENGINE_MODULES
+from Tasks.Selection import extract_features
+from Tasks.Selection import DEFAULT_SELECTION_FILE
+from Tasks.Tiling import tiled_SAT
+from Tasks.Tiling import DEFAULT_TILE_SIZE
+from Tasks.Tiling import DEFAULT_OVERLAP
+from TestcaseGeneration import generate_grid_with_target_blanks
+
+PHASES = ["parse", "cnf", "solve", "fill", "write"]
+
+# Exhaustive engines are skipped above this many distinct CNF variables (unknown cells plus
+# the auxiliary variables of the encoding), they would not finish
+MAX_VARIABLES = {"bruteforce": 24}
+
+# Phases faster than this are treated as noise by compare
+NOISE_FLOOR = 0.001
+
+# Most rules calibrate writes for --solutions auto
+MAX_RULES = 4
+
+def case_seed(seed, size, trap_probability, blank_ratio):
+    """Derives a reproducible seed for one cell of the benchmark matrix."""
+    return f"{seed}-{size}-{trap_probability}-{blank_ratio}"
+
+def generate_case(size, trap_probability, blank_ratio, seed):
+    """
+    Generates the puzzle for one (size, trap probability, blank ratio) cell.
+
+    Returns:
+        Grid or None: The puzzle grid, or None if the generator could not reach
+                      the blank range.
+    """
+    random.seed(case_seed(seed, size, trap_probability, blank_ratio))
+
+    target = blank_ratio * size * size
+    min_blanks = max(0, int(target * 0.9))
+    max_blanks = min(size * size, max(min_blanks, int(target * 1.1) + 1))
+
+    # The generator reports every attempt on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = generate_grid_with_target_blanks(size, size, trap_probability, min_blanks, max_blanks)
+
+    return Grid.from_rows(rows) if rows is not None else None
+
+def run_pipeline(input_file, output_file, solver, encoding, backtracking_engine):
+    """Runs parse -> CNF generation -> solve -> fill -> write once and times each phase."""
+    timings = {}
+
+    start = time.perf_counter()
+    grid = load_grid(input_file)
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cnfs = generate_CNF_s(grid, encoding)
+    timings["cnf"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model, solvable = solve_model(solver, cnfs, backtracking_engine)
+    timings["solve"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    solved_grid = fill_result(grid, model)
+    timings["fill"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    save_grid_to_file(output_file, solved_grid)
+    timings["write"] = time.perf_counter() - start
+
+    return timings, cnfs, solvable
+
+def benchmark_case(grid, solver, encoding, repeat, backtracking_engine, measure_memory, workdir):
+    """
+    Benchmarks one solver/encoding pair on one grid.
+
+    Timings are the minimum over `repeat` runs. Peak memory comes from an extra
+    run under tracemalloc, so its overhead does not leak into the timings.
+    """
+    input_file = os.path.join(workdir, "input.txt")
+    output_file = os.path.join(workdir, "output.txt")
+    save_grid_to_file(input_file, grid)
+
+    best = None
+    for _ in range(repeat):
+        timings, cnfs, solvable = run_pipeline(input_file, output_file, solver, encoding, backtracking_engine)
+        if best is None:
+            best = timings
+        else:
+            best = {phase: min(best[phase], timings[phase]) for phase in PHASES}
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        run_pipeline(input_file, output_file, solver, encoding, backtracking_engine)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    # Outside the timings: the written solution must agree with the puzzle's hints
+    from Data.Validation import validate_grid
+    valid = validate_grid(grid, load_grid(output_file)) if solvable else None
+
+    return {
+        "valid": valid,
+        "clauses": len(cnfs),
+        "variables": len({abs(lit) for clause in cnfs for lit in clause}),
+        "solvable": solvable,
+        "phases": best,
+        "total": sum(best.values()),
+        "peak_memory": peak_memory,
+    }
+
+def run_benchmark(sizes, trap_probabilities, blank_ratios, solvers, encodings, seed=0, repeat=3,
+                  backtracking_engine="dpll", measure_memory=True):
+    """Runs the whole size x trap probability x blank ratio x encoding x solver matrix."""
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            for trap_probability in trap_probabilities:
+                for blank_ratio in blank_ratios:
+                    grid = generate_case(size, trap_probability, blank_ratio, seed)
+                    case = {"size": size, "trap_probability": trap_probability, "blank_ratio": blank_ratio}
+
+                    if grid is None:
+                        results.append({**case, "status": "generation failed"})
+                        print(f"{size}x{size} p={trap_probability} blanks={blank_ratio}: generation failed")
+                        continue
+
+                    unknowns = grid.count('_')
+                    features = extract_features(grid, generate_CNF_s(grid, "combinations"))
+
+                    for encoding in encodings:
+                        variables = len({abs(lit) for clause in generate_CNF_s(grid, encoding) for lit in clause})
+
+                        for solver in solvers:
+                            entry = {**case, "encoding": encoding, "solver": solver, "unknowns": unknowns,
+                                     "features": features}
+
+                            if variables > MAX_VARIABLES.get(solver, variables):
+                                results.append({**entry, "status": "skipped"})
+                                continue
+
+                            entry.update(benchmark_case(grid, solver, encoding, repeat, backtracking_engine,
+                                                        measure_memory, workdir))
+                            entry["status"] = "ok"
+                            results.append(entry)
+                            display_entry(entry)
+
+    return results
+
+def reveal_sequence(grid, solved_grid, moves, seed):
+    """
+    Picks the cells a player reveals: safe blank cells of the puzzle in a random order.
+
+    Returns:
+        list[tuple[int, int, int]]: (row, col, hint) of up to `moves` reveals, the hint being
+                                    the number of traps around the cell in `solved_grid`.
+    """
+    rng = random.Random(seed)
+    safe = [index for index in range(len(grid.cells)) if grid.get(*divmod(index, grid.cols)) == '_'
+            and solved_grid.get(*divmod(index, grid.cols)) != 'T']
+    rng.shuffle(safe)
+
+    reveals = []
+    for index in safe[:moves]:
+        hint = sum(1 for neighbour in solved_grid.neighbours(index) if solved_grid.get(*divmod(neighbour, grid.cols)) == 'T')
+        reveals.append((*divmod(index, grid.cols), hint))
+    return reveals
+
+def benchmark_incremental(sizes, trap_probability, blank_ratio, moves, encoding, seed=0):
+    """
+    Replays reveals on one generated puzzle per size and times every move twice: warm, as
+    an IncrementalBoard update plus re-solve, and cold, as a new CNF solved by a new solver.
+    """
+    from Tasks.Incremental import IncrementalBoard
+
+    results = []
+
+    for size in sizes:
+        grid = generate_case(size, trap_probability, blank_ratio, seed)
+        if grid is None:
+            print(f"{size}x{size}: generation failed")
+            continue
+
+        model, _ = solve_model("pysat", generate_CNF_s(grid, encoding))
+        reveals = reveal_sequence(grid, fill_result(grid, model), moves, seed)
+
+        start = time.perf_counter()
+        board = IncrementalBoard(grid, encoding)
+        board.solve()
+        setup = time.perf_counter() - start
+
+        warm = []
+        cold = []
+        current = grid.copy()
+        for row, col, hint in reveals:
+            start = time.perf_counter()
+            board.reveal(row, col, hint)
+            _, solvable, _ = board.solve()
+            warm.append(time.perf_counter() - start)
+
+            current.set(row, col, str(hint))
+            start = time.perf_counter()
+            _, cold_solvable = solve_model("pysat", generate_CNF_s(current, encoding))
+            cold.append(time.perf_counter() - start)
+
+            if solvable != cold_solvable:
+                raise RuntimeError(f"{size}x{size}: incremental and fresh solves disagree after revealing ({row}, {col})")
+        board.delete()
+
+        entry = {"size": size, "moves": len(reveals), "setup": setup,
+                 "warm_mean": sum(warm) / len(warm) if warm else 0.0, "warm_max": max(warm, default=0.0),
+                 "cold_mean": sum(cold) / len(cold) if cold else 0.0, "cold_max": max(cold, default=0.0)}
+        results.append(entry)
+        print(f"{size}x{size} {encoding}: {entry['moves']} reveals, setup={setup * 1000:.2f}ms "
+              f"incremental mean={entry['warm_mean'] * 1000:.3f}ms max={entry['warm_max'] * 1000:.3f}ms | "
+              f"from scratch mean={entry['cold_mean'] * 1000:.3f}ms max={entry['cold_max'] * 1000:.3f}ms")
+
+    return results
+
+def benchmark_tiled(sizes, trap_probability, blank_ratio, tile_size, overlap, workers, seed=0, whole=True):
+    """
+    Solves one generated puzzle per size with tiles, once per worker count, and (unless
+    `whole` is False) as one CNF, to show how the wall time scales with cores and how much
+    smaller the largest CNF gets.
+    """
+    results = []
+
+    for size in sizes:
+        grid = generate_case(size, trap_probability, blank_ratio, seed)
+        if grid is None:
+            print(f"{size}x{size}: generation failed")
+            continue
+
+        entry = {"size": size, "tile_size": tile_size, "overlap": overlap, "tiled": {}}
+        if whole:
+            start = time.perf_counter()
+            cnfs = generate_CNF_s(grid)
+            _, solvable = solve_model("pysat", cnfs)
+            entry["whole"] = {"time": time.perf_counter() - start, "clauses": len(cnfs), "solvable": solvable}
+            print(f"{size}x{size} whole CNF: {len(cnfs)} clauses, {entry['whole']['time']:.3f}s")
+
+        for count in workers:
+            start = time.perf_counter()
+            _, solvable, tally = tiled_SAT(grid, tile_size, overlap, workers=count)
+            elapsed = time.perf_counter() - start
+            if whole and solvable != entry["whole"]["solvable"]:
+                raise RuntimeError(f"{size}x{size}: tiled and whole-CNF solves disagree")
+
+            entry["tiled"][count] = {"time": elapsed, **tally}
+            print(f"{size}x{size} {tile_size}x{tile_size} tiles, {count} worker(s): {elapsed:.3f}s, "
+                  f"largest window {tally['largest_window']} clauses, {tally['conflicts']} seam conflicts, "
+                  f"{tally['resolves']} re-solves")
+        results.append(entry)
+
+    return results
+
+def search_nodes(cnfs, solver, timeout):
+    """
+    Runs one clause-order sensitive search and counts its nodes (decisions).
+
+    Returns:
+        tuple: (nodes, solvable, seconds); solvable is None if the search ran out of time.
+    """
+    stats = new_search_stats()
+    budget = make_budget(timeout, None)
+
+    start = time.perf_counter()
+    try:
+        if solver == "backtracking:recursive":
+            _, solvable = back_tracking_SAT(cnfs, 0, {}, stats, budget)
+        elif solver == "backtracking:dpll":
+            _, solvable = dpll_SAT(cnfs, stats, budget)
+        else:
+            _, solvable = brute_force_SAT(cnfs, 0, {}, True, budget, stats)
+    except BudgetExceeded:
+        solvable = None
+    if budget is not None and budget.reason is not None:
+        solvable = None
+
+    return stats["decisions"], solvable, time.perf_counter() - start
+
+def benchmark_ordering(inputs, solvers, orderings, encoding, timeout):
+    """
+    Counts search nodes of every clause-walking solver on every input, once per clause
+    ordering, so the effect of reordering shows against the natural order.
+    """
+    results = []
+
+    for input_file in inputs:
+        cnfs = generate_CNF_s(load_grid(input_file), encoding)
+
+        for ordering in orderings:
+            reordered = reorder_CNF_s(cnfs, ordering)
+            delay = check_delay(reordered)
+
+            for solver in solvers:
+                nodes, solvable, elapsed = search_nodes(reordered, solver, timeout)
+                entry = {"input": input_file, "ordering": ordering, "solver": solver, "check_delay": delay,
+                         "nodes": nodes, "solvable": solvable, "time": elapsed}
+                results.append(entry)
+
+                status = "timeout" if solvable is None else ("sat" if solvable else "unsat")
+                print(f"{input_file} {ordering} (check delay {delay}) {solver}: {nodes} nodes, {status}, "
+                      f"{elapsed * 1000:.2f}ms")
+
+    return results
+
+def engine_import_time(solution, repeat=5):
+    """
+    Measures how long importing an engine's module takes in a fresh interpreter that
+    already loaded the main mode (UI.Execution), as `--solutions auto` pays it.
+
+    Returns:
+        float: The minimum over `repeat` interpreters, in seconds.
+    """
+    code = ("import importlib, time; import UI.Execution; start = time.perf_counter(); "
+            f"importlib.import_module({ENGINE_MODULES[solution]!r}); print(time.perf_counter() - start)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    return min(float(subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True,
+                                    check=True).stdout) for _ in range(repeat))
+
+def case_costs(results, import_times):
+    """
+    Collects the cost of every solver/encoding pair on every benchmark case: its total
+    time plus its engine's import time.
+
+    Returns:
+        list[tuple]: (features, {(solver, encoding): cost}) per case with a valid result.
+    """
+    cases = {}
+    for entry in results:
+        if entry.get("status") != "ok" or "features" not in entry or entry.get("valid") is False:
+            continue
+        features, costs = cases.setdefault(entry_key(entry)[:3], (entry["features"], {}))
+        costs[(entry["solver"], entry["encoding"])] = entry["total"] + import_times[entry["solver"]]
+
+    return list(cases.values())
+
+def segment_cost(cases, start, end):
+    """
+    The pair with the lowest summed cost over cases[start:end], among the pairs every
+    one of those cases has a result for.
+
+    Returns:
+        tuple: (summed cost, pair), the cost is infinite if no pair ran on every case.
+    """
+    pairs = set.intersection(*(set(costs) for _, costs in cases[start:end]))
+    return min(((sum(costs[pair] for _, costs in cases[start:end]), pair) for pair in pairs),
+               default=(float("inf"), None))
+
+def calibrate_rules(cases, feature="largest_component"):
+    """
+    Turns the per-case costs into ordered threshold rules on one feature. Cases are
+    sorted by the feature and cut into at most MAX_RULES segments, each solved by one
+    pair, so that the summed cost is lowest (dynamic programming over the cut points).
+    The fewest segments within NOISE_FLOOR per case of the best are kept, so timing
+    noise on a single grid does not add a rule. Each threshold lies halfway between the
+    last case of a segment and the first case of the next.
+
+    Returns:
+        list[dict]: Rules in the format of Tasks.Selection, the last one matching every grid.
+    """
+    cases = sorted(cases, key=lambda case: case[0][feature])
+    values = [features[feature] for features, _ in cases]
+    n = len(cases)
+
+    # best[k][i]: (cost, cut points) of the first i cases in k segments; no cut between equal values
+    best = [[(float("inf"), None)] * (n + 1) for _ in range(MAX_RULES + 1)]
+    best[0][0] = (0.0, [])
+    for k in range(1, MAX_RULES + 1):
+        for i in range(1, n + 1):
+            for j in range(k - 1, i):
+                if best[k - 1][j][1] is None or (j > 0 and values[j - 1] == values[j]):
+                    continue
+                cost = best[k - 1][j][0] + segment_cost(cases, j, i)[0]
+                if cost < best[k][i][0]:
+                    best[k][i] = (cost, best[k - 1][j][1] + [j])
+
+    lowest = min(best[k][n][0] for k in range(1, MAX_RULES + 1))
+    k = next(k for k in range(1, MAX_RULES + 1) if best[k][n][0] <= lowest + NOISE_FLOOR * n)
+    cuts = best[k][n][1] + [n]
+
+    rules = []
+    for start, end in zip(cuts, cuts[1:]):
+        solver, encoding = segment_cost(cases, start, end)[1]
+        if rules and (rules[-1]["solution"], rules[-1]["encoding"]) == (solver, encoding):
+            rules.pop()
+        when = {f"max_{feature}": (values[end - 1] + values[end]) // 2} if end < n else {}
+        rules.append({"when": when, "solution": solver, "encoding": encoding})
+    return rules
+
+def display_entry(entry):
+    phases = " ".join(f"{phase}={entry['phases'][phase] * 1000:.2f}ms" for phase in PHASES)
+    memory = f" peak={entry['peak_memory'] / 1024:.0f}KiB" if entry["peak_memory"] is not None else ""
+
+    print(f"{entry['size']}x{entry['size']} p={entry['trap_probability']} blanks={entry['blank_ratio']} "
+          f"{entry['encoding']}/{entry['solver']}: {entry['clauses']} clauses, {entry['variables']} vars, "
+          f"{phases} total={entry['total'] * 1000:.2f}ms{memory}" + (" INVALID SOLUTION" if entry["valid"] is False else ""))
+
+def entry_key(entry):
+    return (entry["size"], entry["trap_probability"], entry["blank_ratio"], entry.get("encoding"), entry.get("solver"))
+
+def compare_results(baseline, current, threshold):
+    """
+    Compares two benchmark files.
+
+    Returns:
+        list[str]: One line per phase (or total) that got slower than the baseline by
+                   more than `threshold` (a fraction, 0.2 = 20%).
+    """
+    baseline_entries = {entry_key(entry): entry for entry in baseline["results"] if entry.get("status") == "ok"}
+    regressions = []
+
+    for entry in current["results"]:
+        old = baseline_entries.get(entry_key(entry))
+        if entry.get("status") != "ok" or old is None:
+            continue
+
+        pairs = [(phase, old["phases"][phase], entry["phases"][phase]) for phase in PHASES]
+        pairs.append(("total", old["total"], entry["total"]))
+
+        for name, before, after in pairs:
+            if after - before > NOISE_FLOOR and after > before * (1 + threshold):
+                size, trap_probability, blank_ratio, encoding, solver = entry_key(entry)
+                regressions.append(f"{size}x{size} p={trap_probability} blanks={blank_ratio} {encoding}/{solver} "
+                                   f"{name}: {before * 1000:.2f}ms -> {after * 1000:.2f}ms "
+                                   f"(+{(after / before - 1) * 100 if before else float('inf'):.0f}%)")
+
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every solver over generated grids")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark matrix and write a JSON baseline")
+    run.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20])
+    run.add_argument('--trap-probabilities', type=float, nargs='+', default=[0.15, 0.25])
+    run.add_argument('--blank-ratios', type=float, nargs='+', default=[0.3, 0.5])
+    run.add_argument('--solvers', nargs='+', choices=SOLUTIONS, default=SOLUTIONS)
+    run.add_argument('--encodings', nargs='+', choices=ENCODINGS, default=["combinations"])
+    run.add_argument('--backtracking-engine', choices=["dpll", "recursive"], default="dpll")
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    run.add_argument('-o', '--output', default="benchmark.json")
+
+    compare = commands.add_parser("compare", help="Flag regressions of a run against a baseline")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown as a fraction (default: 0.2)")
+
+    incremental = commands.add_parser("incremental", help="Time per-move re-solves of an IncrementalBoard against solving from scratch")
+    incremental.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 40, 80])
+    incremental.add_argument('--trap-probability', type=float, default=0.15)
+    incremental.add_argument('--blank-ratio', type=float, default=0.5)
+    incremental.add_argument('--moves', type=int, default=50)
+    incremental.add_argument('--encoding', choices=ENCODINGS, default="combinations")
+    incremental.add_argument('--seed', type=int, default=0)
+
+    tiled = commands.add_parser("tiled", help="Time tiled solving of large grids per worker count against one whole CNF")
+    tiled.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 500])
+    tiled.add_argument('--trap-probability', type=float, default=0.15)
+    tiled.add_argument('--blank-ratio', type=float, default=0.5)
+    tiled.add_argument('--tile-size', type=int, default=DEFAULT_TILE_SIZE)
+    tiled.add_argument('--overlap', type=int, default=DEFAULT_OVERLAP)
+    tiled.add_argument('--workers', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    tiled.add_argument('--no-whole', action='store_true', help="Skip the whole-CNF solve")
+    tiled.add_argument('--seed', type=int, default=0)
+
+    ordering = commands.add_parser("ordering", help="Count search nodes of the clause-walking solvers per clause ordering")
+    ordering.add_argument('--inputs', nargs='+', default=sorted(glob.glob("testcases/input_*.txt")))
+    ordering.add_argument('--solvers', nargs='+', choices=["backtracking:recursive", "backtracking:dpll", "bruteforce"],
+                          default=["backtracking:recursive", "backtracking:dpll", "bruteforce"])
+    ordering.add_argument('--orderings', nargs='+', choices=ORDERINGS, default=ORDERINGS)
+    ordering.add_argument('--encoding', choices=ENCODINGS, default="combinations")
+    ordering.add_argument('--timeout', type=float, default=10.0, help="Seconds per search before it counts as a timeout")
+
+    calibrate = commands.add_parser("calibrate", help="Derive the --solutions auto thresholds from a run")
+    calibrate.add_argument('benchmark', help="JSON written by run")
+    calibrate.add_argument('-o', '--output', default=DEFAULT_SELECTION_FILE)
+    calibrate.add_argument('--feature', choices=["unknowns", "clauses", "largest_component"], default="largest_component")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        with open(args.benchmark) as f:
+            results = json.load(f)["results"]
+
+        import_times = {solution: engine_import_time(solution) for solution in SOLUTIONS}
+        cases = case_costs(results, import_times)
+        if not cases:
+            print(f"{args.benchmark} has no results with features, rerun the benchmark")
+            return 1
+
+        rules = calibrate_rules(cases, args.feature)
+        report = {
+            "meta": {
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "benchmark": args.benchmark,
+                "cases": len(cases),
+                "import_times": import_times,
+            },
+            "rules": rules,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+        for solution, seconds in import_times.items():
+            print(f"import {ENGINE_MODULES[solution]}: {seconds * 1000:.2f}ms")
+        for rule in rules:
+            bounds = ", ".join(f"{bound}={value}" for bound, value in rule["when"].items()) or "otherwise"
+            print(f"{bounds}: {rule['solution']}/{rule['encoding']}")
+        print(f"Saved {len(rules)} rules from {len(cases)} cases to {args.output}")
+        return 0
+
+    if args.command == "ordering":
+        benchmark_ordering(args.inputs, args.solvers, args.orderings, args.encoding, args.timeout)
+        return 0
+
+    if args.command == "tiled":
+        benchmark_tiled(args.sizes, args.trap_probability, args.blank_ratio, args.tile_size, args.overlap,
+                        args.workers, args.seed, not args.no_whole)
+        return 0
+
+    if args.command == "incremental":
+        benchmark_incremental(args.sizes, args.trap_probability, args.blank_ratio, args.moves, args.encoding, args.seed)
+        return 0
+
+    if args.command == "run":
+        results = run_benchmark(args.sizes, args.trap_probabilities, args.blank_ratios, args.solvers,
+                                args.encodings, args.seed, args.repeat, args.backtracking_engine,
+                                not args.no_memory)
+        report = {
+            "meta": {
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "arguments": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(results)} results to {args.output}")
+
+        invalid = [entry for entry in results if entry.get("valid") is False]
+        if invalid:
+            print(f"{len(invalid)} solution(s) do not match their puzzle's hints")
+            return 1
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare_results(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
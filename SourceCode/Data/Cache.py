@@ -0,0 +1,174 @@
+import hashlib
+import os
+import tempfile
+from array import array
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CACHE_DIRECTORY = ".minesweeper_cache"
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# Entry files: a 4-byte magic, then int32 literals. A CNF separates its clauses with 0 like
+# DIMACS does; a model has one extra byte, 1 for SAT and 0 for UNSAT, before its literals.
+CNF_MAGIC = b"CNF1"
+MODEL_MAGIC = b"MDL1"
+
+# Writes between two scans of the directory when this process's running size total stays
+# under max_size, so the writes of other processes sharing the directory are accounted for
+SCAN_INTERVAL = 256
+
+# An eviction brings the directory down to this fraction of max_size, so a full cache is
+# scanned again only after that much more has been written, not on the next write
+EVICT_TARGET = 0.9
+
+# Content-addressed cache of CNFs and models. Entries are named after a sha256 of the grid
+# (its size and cell buffer) plus the encoding, and the solver for models, so any change of
+# the board or of the options is a different entry. Writes go to a temporary file that is
+# then renamed over the entry, so readers in other processes only ever see whole files.
+# A read refreshes the entry's mtime; when the directory outgrows max_size, the entries with
+# the oldest mtime are evicted under an exclusive lock (fcntl, where available).
+# The directory is not scanned on every write: each process keeps a running total of its
+# size (from the last scan plus its own writes since) and only scans, and evicts, once that
+# total goes over max_size or every SCAN_INTERVAL writes.
+class Cache:
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = {"cnf": 0, "model": 0}
+        self.misses = {"cnf": 0, "model": 0}
+        self.size = None
+        self.writes = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, grid, *parts):
+        digest = hashlib.sha256(f"{grid.rows}x{grid.cols}:".encode("ascii"))
+        digest.update(grid.cells)
+        for part in parts:
+            digest.update(f"\0{part}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_cnf(self, grid, encoding):
+        data = self.read(self.key(grid, encoding) + ".cnf", "cnf")
+        if data is None or data[:4] != CNF_MAGIC:
+            return None
+
+        literals = array('i')
+        literals.frombytes(data[4:])
+
+        cnfs = []
+        clause = []
+        for lit in literals:
+            if lit:
+                clause.append(lit)
+            else:
+                cnfs.append(tuple(clause))
+                clause = []
+        return cnfs
+
+    def put_cnf(self, grid, encoding, cnfs):
+        literals = array('i')
+        for clause in cnfs:
+            literals.extend(clause)
+            literals.append(0)
+
+        self.write(self.key(grid, encoding) + ".cnf", CNF_MAGIC + literals.tobytes())
+
+    def puzzle_key(self, grid, encoding):
+        # Hashed once per puzzle, from the unsolved grid, and shared by all its solvers' models
+        return self.key(grid, encoding)
+
+    def model_name(self, puzzle_key, solver):
+        return hashlib.sha256(f"{puzzle_key}\0{solver}".encode("utf-8")).hexdigest() + ".model"
+
+    def get_model(self, puzzle_key, solver):
+        # (model, solvable) or None
+        data = self.read(self.model_name(puzzle_key, solver), "model")
+        if data is None or data[:4] != MODEL_MAGIC:
+            return None
+
+        literals = array('i')
+        literals.frombytes(data[5:])
+        return literals.tolist(), data[4] == 1
+
+    def put_model(self, puzzle_key, solver, model, solvable):
+        # Unknown results (solvable None) depend on the budget and are not cached
+        if solvable is None:
+            return
+        data = MODEL_MAGIC + bytes([1 if solvable else 0]) + array('i', model).tobytes()
+        self.write(self.model_name(puzzle_key, solver), data)
+
+    def read(self, name, kind):
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Never written, or evicted by another process between open and utime
+            self.misses[kind] += 1
+            return None
+
+        self.hits[kind] += 1
+        return data
+
+    def write(self, name, data):
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, os.path.join(self.directory, name))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        self.writes += 1
+        if self.size is not None:
+            self.size += len(data)
+        if self.size is None or self.size > self.max_size or self.writes % SCAN_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        lock = open(os.path.join(self.directory, ".lock"), "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            # Least recently used first
+            entries.sort()
+            limit = self.max_size * EVICT_TARGET if total > self.max_size else self.max_size
+            for _, size, path in entries:
+                if total <= limit:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self.size = total
+        finally:
+            lock.close()
+
+def model_from_grids(grid, solved_grid):
+    # The cell literals of a solved grid, over the blanks of `grid`: enough for fill_result
+    # to rebuild solved_grid from grid
+    return [index + 1 if solved_grid.cells[index] == TRAP else -(index + 1)
+            for index in range(len(grid.cells)) if grid.cells[index] == UNKNOWN]
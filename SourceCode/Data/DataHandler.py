@@ -1,29 +1,52 @@
+import mmap
 from Data.Display import display_two_grids
 from Data.Display import save_grid_to_file
+from Data.Grid import Grid
+from Data.Grid import TRAP
+from Data.Grid import GEM
+from Data.Grid import UNKNOWN
+from Data.Grid import BINARY_MAGIC
 
 def load_grid(filename):
-    f = open(filename, "r")
-    grid = []
-    
-    line = f.readline()
-    while (line):        
-        line = line.replace("\n", "")
-        grid.append(line.split(", "))        
-        line = f.readline()
-    
+    f = open(filename, "rb")
+
+    if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+        # Binary grids are mapped copy-on-write: the cells are read straight from the page
+        # cache, and edits (presolve, fill) stay private to this process
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        f.close()
+        return Grid.from_binary(buffer)
+
+    f.seek(0)
+    data = f.read()
     f.close()
 
-    return grid
+    return Grid.from_text(data)
 
 # After solving the problem, the program should fill in all blanks with the results.
 def fill_result(grid, truth):
-    # grid: the 2D list
+    # grid: the Grid
     # truth: the 1D list containing all unit clauses
 
-    grid = [['T' if i * len(grid[i]) + j + 1 in truth else 'G' if grid[i][j] == '_' else grid[i][j]
-                 for j in range(len(grid[i]))] for i in range(len(grid))]
+    # Blanks become gems in one pass over the buffer, then every true cell literal marks a trap:
+    # O(cells + model) instead of looking every cell up in the model
+    cells = bytearray(grid.cells).replace(b'_', b'G')
+    for literal in truth:
+        if 0 < literal <= len(cells):
+            cells[literal - 1] = TRAP
+
+    return Grid(grid.rows, grid.cols, cells)
+
+# A solver stopped by its budget only knows part of the cells: true literals are traps,
+# false ones gems, and every other blank stays blank.
+def fill_partial(grid, literals):
+    cells = bytearray(grid.cells)
+    for literal in literals:
+        index = abs(literal) - 1
+        if index < len(cells) and cells[index] == UNKNOWN:
+            cells[index] = TRAP if literal > 0 else GEM
 
-    return grid        
+    return Grid(grid.rows, grid.cols, cells)
 
 def check_cnf(cnf, bridge):
     undecided_literal = False
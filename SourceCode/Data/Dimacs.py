@@ -0,0 +1,162 @@
+import gzip
+import json
+import re
+import shutil
+import tempfile
+import warnings
+from Data.Grid import Grid
+from Data.Grid import UNKNOWN
+
+# Clause lines are buffered in memory up to this size, then spooled to a temporary file
+SPOOL_SIZE = 8 * 1024 * 1024
+
+# Comment and header lines, and the "%" line that ends a SATLIB file
+HEADER_LINES = re.compile(rb'^[ \t]*[cp].*$', re.MULTILINE)
+SATLIB_END = re.compile(rb'^[ \t]*%', re.MULTILINE)
+
+# Sidecar file next to a DIMACS file: the grid it encodes and which variable is which cell
+MAP_SUFFIX = ".map.json"
+
+def open_dimacs(filename, mode):
+    # Binary file object, gzip-compressed when the name ends with .gz
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode)
+    return open(filename, mode)
+
+# Streams clauses into a DIMACS file. The "p cnf <variables> <clauses>" header has to come
+# first but is only known after the last clause, so clause lines are spooled (in memory, then
+# on disk past SPOOL_SIZE) and copied behind the header on close; nothing holds the CNF as a
+# list. add_clause fits stream_CNF_s and any other clause sink.
+class DimacsWriter:
+    def __init__(self, filename, comments=()):
+        self.filename = filename
+        self.comments = list(comments)
+        self.variables = 0
+        self.clauses = 0
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+    def add_clause(self, clause):
+        for lit in clause:
+            if abs(lit) > self.variables:
+                self.variables = abs(lit)
+        self.spool.write(' '.join(map(str, clause)).encode("ascii") + b" 0\n")
+        self.clauses += 1
+
+    def close(self):
+        self.spool.seek(0)
+        with open_dimacs(self.filename, "wb") as f:
+            for comment in self.comments:
+                f.write(f"c {comment}\n".encode("utf-8"))
+            f.write(f"p cnf {self.variables} {self.clauses}\n".encode("ascii"))
+            shutil.copyfileobj(self.spool, f)
+        self.spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.spool.close()
+
+def write_dimacs(filename, cnfs, comments=()):
+    with DimacsWriter(filename, comments) as writer:
+        for clause in cnfs:
+            writer.add_clause(clause)
+    return writer.variables, writer.clauses
+
+def write_variable_map(filename, grid, variables):
+    # Cell variables are index + 1; every variable above rows * cols is an auxiliary one
+    cells = [[index + 1, *divmod(index, grid.cols)] for index in range(len(grid.cells)) if grid.cells[index] == UNKNOWN]
+
+    with open(filename + MAP_SUFFIX, "w") as f:
+        json.dump({
+            "rows": grid.rows,
+            "cols": grid.cols,
+            "grid": grid.to_text().decode("ascii"),
+            "variables": variables,
+            "cells": cells,
+        }, f)
+
+def read_variable_map(filename):
+    # The grid a DIMACS file was written for, or None without a sidecar
+    try:
+        with open(filename + MAP_SUFFIX) as f:
+            variable_map = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    return Grid.from_text(variable_map["grid"].encode("ascii"))
+
+def read_dimacs(filename):
+    # Comment and header lines are blanked by one regex pass over the whole file, then every
+    # literal is parsed by numpy in one call and the clauses are cut at the 0 terminators.
+    # Returns the clauses as tuples.
+    # SATLIB files end with a "%" line and a lone 0, which is not an empty clause: reading
+    # stops at the "%".
+    # NumPy is only loaded by runs that read a DIMACS file
+    import numpy as np
+
+    with open_dimacs(filename, "rb") as f:
+        data = f.read()
+
+    end = SATLIB_END.search(data)
+    if end is not None:
+        data = data[:end.start()]
+    body = HEADER_LINES.sub(b'', data)
+
+    if not body.strip():
+        return []
+    try:
+        # NumPy only warns when it stops at something that is not an integer
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            literals = np.fromstring(body.decode("ascii"), dtype=np.int64, sep=' ')
+    except (ValueError, DeprecationWarning, UnicodeDecodeError):
+        raise ValueError(f"{filename}: not a DIMACS CNF") from None
+
+    values = literals.tolist()
+    cnfs = []
+    start = 0
+    for end in np.flatnonzero(literals == 0).tolist():
+        cnfs.append(tuple(values[start:end]))
+        start = end + 1
+    if start < len(values):
+        # Last clause without its terminating 0
+        cnfs.append(tuple(values[start:]))
+
+    return cnfs
+
+def read_model(filename):
+    # A SAT solver's answer, SAT competition style ("s SATISFIABLE" plus "v" lines) or
+    # MiniSat style ("SAT" then the literals). Returns (model, solvable), solvable None when
+    # the solver gave up.
+    with open_dimacs(filename, "rb") as f:
+        lines = f.read().decode("ascii").splitlines()
+
+    solvable = None
+    model = []
+    for line in lines:
+        words = line.split()
+        if not words or words[0] == 'c':
+            continue
+
+        if words[0] == 's':
+            words = words[1:]
+            if not words:
+                raise ValueError(f"{filename}: \"s\" line without a status")
+        if words[0] in ("SATISFIABLE", "SAT"):
+            solvable = True
+        elif words[0] in ("UNSATISFIABLE", "UNSAT"):
+            solvable = False
+        elif words[0] in ("UNKNOWN", "INDETERMINATE"):
+            solvable = None
+        else:
+            model.extend(int(word) for word in words if word != 'v' and word != '0')
+
+    return model, solvable
+
+def satisfies(cnfs, model):
+    true_literals = set(model)
+    return all(any(lit in true_literals for lit in clause) for clause in cnfs)
@@ -1,53 +1,125 @@
+from Data.Grid import BINARY_SUFFIX
+
 SEPERATOR = '|'
 
 def display_grid(grid):
-    for i in range(len(grid)):
-        for j in range(len(grid[i])):
-            print(f"{grid[i][j]}{', ' if j < len(grid[i]) -1 else ''}", end='')
-        
-        print(f"{'\n' if i < len(grid) - 1 else ''}", end='')
-
-    print("")
+    print(grid.to_text().decode("ascii"))
 
 def display_cnf_s(cnf_s):
     for clause in cnf_s:
         print(clause)
 
-def display_two_grids(left_grid, right_grid, seperator=SEPERATOR):
-    for i in range(len(left_grid)):
-        for j in range(len(left_grid[i])):
-            print(left_grid[i][j], end='')
-            if j < len(left_grid[i]) - 1:
-                print(', ', end='')
+def display_cnf_summary(encoding, cnf_s, generation_time):
+    number_of_variables = len({abs(lit) for clause in cnf_s for lit in clause})
 
-        print(f"  {seperator}  ", end='')
+    print(f"CNF ({encoding}): {len(cnf_s)} clauses, {number_of_variables} variables, generated in {generation_time:.5f}(s)")
 
-        for j in range(len(right_grid[i])):
-            print(right_grid[i][j], end='')
-            if j < len(right_grid[i]) - 1:
-                print(', ', end='')
+def display_ordering_summary(ordering, delay_before, delay_after, ordering_time):
+    print(f"Ordering ({ordering}): check delay {delay_before} -> {delay_after}, reordered in {ordering_time:.5f}(s)")
 
-        print('')    
+def display_selection(features, solution, encoding, rule, selection_time):
+    chosen_by = f"rule {rule + 1}" if rule is not None else "fallback"
+    print(f"Auto ({chosen_by}): {solution}/{encoding} for " + ", ".join(f"{name}={value}" for name, value in features.items())
+          + f", features in {selection_time:.5f}(s)")
 
-def save_grid_to_file(filename, grid):
-    f = open(filename, "w")
-    
-    for i in range(len(grid)):
-        for j in range(len(grid[i])):
-            f.write(f"{grid[i][j]}{', ' if j < len(grid[i]) - 1 else ''}")         
-        
-        f.write(f"{'\n' if i < len(grid) - 1 else ''}")
+def display_presolve_summary(grid, residual, fixed, clauses_before, clauses_after, presolve_time):
+    variables_before = grid.count('_')
+    variables_after = residual.count('_')
+    traps = sum(1 for trap in fixed.values() if trap)
+
+    def reduction(before, after):
+        return f"{before} -> {after} (-{100 * (before - after) / before:.0f}%)" if before else f"{before} -> {after}"
+
+    print(f"Presolve: fixed {len(fixed)} cells ({traps} traps, {len(fixed) - traps} gems) in {presolve_time:.5f}(s)")
+    print(f"          variables {reduction(variables_before, variables_after)}, clauses {reduction(clauses_before, clauses_after)}")
 
+def display_solver_calls(calls):
+    for number, call in enumerate(calls, 1):
+        print(f"  call {number}: {'SAT' if call['result'] else 'UNSAT'} in {call['time']:.5f}(s), "
+              f"{call['conflicts']} conflicts, {call['decisions']} decisions, {call['propagations']} propagations")
+
+def display_two_grids(left_grid, right_grid, seperator=SEPERATOR):
+    # Both grids side by side, printed in one call
+    print('\n'.join(f"{left_grid.row_text(i)}  {seperator}  {right_grid.row_text(i)}" for i in range(left_grid.rows)))
+
+def save_grid_to_file(filename, grid):
+    # The whole grid in one write; a .grid file gets the binary format
+    f = open(filename, "wb")
+    f.write(grid.to_binary() if filename.endswith(BINARY_SUFFIX) else grid.to_text())
     f.close()
 
 def display_result(previous_grid, solved_grid, executed_time):
     before_script = "Before solving"
     after_script = "After solving"
 
-    real_lenght_of_grid = 3 * len(previous_grid) - 2
+    real_lenght_of_grid = 3 * previous_grid.cols - 2
 
     length_to_print_after_script = real_lenght_of_grid - len(before_script) + 2 if real_lenght_of_grid >= len(before_script) else 1
 
     print(f"{before_script}: {' ' * length_to_print_after_script} {after_script}:")
     display_two_grids(previous_grid, solved_grid)
-    print(f"\n===>Executed Time: {executed_time:.5f}(s)")    
\ No newline at end of file
+    print(f"\n===>Executed Time: {executed_time:.5f}(s)")    
+
+def display_search_stats(engine, stats, executed_time):
+    # Rates are per second of search time, so engines can be compared on the same grid
+    elapsed = max(executed_time, 1e-9)
+
+    print(f"[{engine}] Decisions: {stats['decisions']} ({stats['decisions'] / elapsed:.0f}/s)"
+          f" | Propagations: {stats['propagations']} ({stats['propagations'] / elapsed:.0f}/s)"
+          f" | Conflicts: {stats['conflicts']} | Backtracks: {stats['backtracks']}")
+
+def display_portfolio(winner, report):
+    print(f"Portfolio winner: {winner if winner is not None else 'none'}")
+    for solution, entry in report.items():
+        line = f"  {solution}: {entry['status']}"
+        if entry.get("time") is not None:
+            line += f" after {entry['time']:.5f}(s)"
+        if "time_to_cancel" in entry:
+            line += f", time-to-cancel {entry['time_to_cancel'] * 1000:.2f}ms"
+        if "error" in entry:
+            line += f" ({entry['error']})"
+        print(line)
+
+def display_cache_stats(cache):
+    print(f"Cache ({cache.directory}): CNF {cache.hits['cnf']} hit(s) / {cache.misses['cnf']} miss(es), "
+          f"models {cache.hits['model']} hit(s) / {cache.misses['model']} miss(es)")
+
+def display_probabilities(grid, probabilities):
+    # Heat map: every blank shows P(trap) as a percentage, the other cells stay as they are
+    def cell(index):
+        if index in probabilities:
+            return f"{100 * probabilities[index]:.0f}%"
+        return chr(grid.cells[index])
+
+    print('\n'.join(' '.join(f"{cell(i * grid.cols + j):>4}" for j in range(grid.cols)) for i in range(grid.rows)))
+
+    safest = min(probabilities.values(), default=None)
+    if safest is not None:
+        cells = [divmod(index, grid.cols) for index in sorted(probabilities) if probabilities[index] == safest]
+        print(f"Safest cell(s), P(trap) = {safest:.4f}: {', '.join(f'({i}, {j})' for i, j in cells[:10])}"
+              f"{' ...' if len(cells) > 10 else ''}")
+
+def display_counting_stats(number_of_solutions, counter, executed_time):
+    print(f"{number_of_solutions} solution(s), {counter.decisions} decisions, {counter.cache_hits} component cache hits, "
+          f"in {executed_time:.5f}(s)")
+
+def display_validation_report(report):
+    issues = ", ".join(f"{count} {issue.replace('_', ' ')}" for issue, count in report["issues"].items())
+    examples = " ".join(f"({row}, {col}) {issue}" for row, col, issue in report.get("examples", []))
+    print(f"INVALID {report['id']}: {issues}" + (f" | e.g. {examples}" if examples else "") +
+          (f" | {report['error']}" if "error" in report else ""))
+
+def display_stats(stats):
+    print("Stats:")
+    for name, elapsed in stats["phases_ns"].items():
+        print(f"  {name}: {elapsed / 1e6:.3f}ms")
+    for name, value in stats["counters"].items():
+        print(f"  {name}: {value}")
+    if stats["peak_rss"] is not None:
+        print(f"  peak RSS: {stats['peak_rss'] / (1024 * 1024):.1f}MB")
+
+def display_profile(profiler, filename, limit=15):
+    # The hottest functions by cumulative time; the full profile is in `filename` (pstats format)
+    import pstats
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+    print(f"Profile saved to {filename} (python -m pstats {filename})")
@@ -0,0 +1,136 @@
+import functools
+import struct
+
+UNKNOWN = ord('_')
+TRAP = ord('T')
+GEM = ord('G')
+ZERO = ord('0')
+EIGHT = ord('8')
+
+# Binary grid files: magic, rows and cols as little-endian uint32, then one byte per cell
+BINARY_MAGIC = b"MSGR"
+BINARY_HEADER = struct.Struct("<4sII")
+BINARY_SUFFIX = ".grid"
+
+@functools.lru_cache(maxsize=None)
+def neighbour_offsets(cols):
+    # The 16 offset tables only depend on the row length, so grids of the same width share them
+    offsets = {}
+    for key in range(16):
+        top, bottom, left, right = key & 1, key & 2, key & 4, key & 8
+        offsets[key] = tuple(dr * cols + dc
+                             for dr in (-1, 0, 1) if not (dr == -1 and top) and not (dr == 1 and bottom)
+                             for dc in (-1, 0, 1) if not (dc == -1 and left) and not (dc == 1 and right)
+                             if dr or dc)
+    return offsets
+
+# A grid stored as one byte per cell (the cell's character), row-major, so cell (i, j)
+# lives at index i * cols + j and is the CNF variable index + 1.
+# Neighbours are found through offset tables: a cell's neighbour offsets only depend on
+# which borders it touches, so 16 small tables (one per top/bottom/left/right combination)
+# cover every cell of the grid.
+# `cells` is a bytearray, or a writable memoryview when the grid is mapped from a binary file.
+class Grid:
+    __slots__ = ("rows", "cols", "cells", "offsets")
+
+    def __init__(self, rows, cols, cells=None):
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytearray(b'_' * (rows * cols)) if cells is None else cells
+
+        if len(self.cells) != rows * cols:
+            raise ValueError(f"A {rows}x{cols} grid needs {rows * cols} cells, got {len(self.cells)}")
+
+        self.offsets = neighbour_offsets(cols)
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows: a list of rows, each a list of one-character cells
+        number_of_cols = len(rows[0]) if rows else 0
+        cells = bytearray()
+
+        for row in rows:
+            text = ''.join(row)
+            if len(row) != number_of_cols or len(text) != number_of_cols:
+                raise ValueError(f"Every row needs {number_of_cols} one-character cells: {row}")
+            cells += text.encode("ascii")
+
+        return cls(len(rows), number_of_cols, cells)
+
+    @classmethod
+    def from_text(cls, data):
+        # data: the bytes of a text grid file, rows of "c, c, c" cells. Dropping every
+        # separator in one translate leaves exactly the cell buffer.
+        lines = [line for line in data.split(b'\n') if line.strip()]
+        number_of_cols = (len(lines[0].rstrip(b'\r')) + 2) // 3 if lines else 0
+
+        return cls(len(lines), number_of_cols, bytearray(data.translate(None, b', \r\n')))
+
+    @classmethod
+    def from_binary(cls, buffer):
+        # The cells stay a view of `buffer` (e.g. an mmap), nothing is copied
+        magic, rows, cols = BINARY_HEADER.unpack_from(buffer)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a binary grid")
+
+        return cls(rows, cols, memoryview(buffer)[BINARY_HEADER.size:BINARY_HEADER.size + rows * cols])
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def get(self, row, col):
+        return chr(self.cells[row * self.cols + col])
+
+    def set(self, row, col, value):
+        self.cells[row * self.cols + col] = ord(value)
+
+    def is_hint(self, index):
+        return ZERO <= self.cells[index] <= EIGHT
+
+    def hint(self, index):
+        return self.cells[index] - ZERO
+
+    def neighbours(self, index):
+        row, col = divmod(index, self.cols)
+        key = (row == 0) | (row == self.rows - 1) << 1 | (col == 0) << 2 | (col == self.cols - 1) << 3
+        return [index + offset for offset in self.offsets[key]]
+
+    def count(self, value):
+        cells = self.cells if isinstance(self.cells, bytearray) else self.cells.tobytes()
+        return cells.count(ord(value))
+
+    def copy(self):
+        return Grid(self.rows, self.cols, bytearray(self.cells))
+
+    def row(self, row):
+        return bytes(self.cells[row * self.cols:(row + 1) * self.cols]).decode("ascii")
+
+    def row_text(self, row):
+        return ', '.join(self.row(row))
+
+    def to_rows(self):
+        return [list(self.row(i)) for i in range(self.rows)]
+
+    def to_text(self):
+        # Every row is laid out as "c, c, c\n": the separators are written once for the whole
+        # grid, then each row's cells drop into every third byte with one slice assignment
+        if not self.cells:
+            return b''
+
+        width = 3 * self.cols - 1
+        text = bytearray((b'_, ' * self.cols)[:-2] + b'\n') * self.rows
+        for i in range(self.rows):
+            text[i * width:(i + 1) * width - 1:3] = self.cells[i * self.cols:(i + 1) * self.cols]
+
+        del text[-1]
+        return text
+
+    def to_binary(self):
+        return BINARY_HEADER.pack(BINARY_MAGIC, self.rows, self.cols) + bytes(self.cells)
+
+    def __reduce__(self):
+        # Mapped grids are pickled (e.g. to worker processes) as plain bytearrays
+        return Grid, (self.rows, self.cols, bytearray(self.cells))
+
+    def __eq__(self, other):
+        return isinstance(other, Grid) and (self.rows, self.cols, self.cells) == (other.rows, other.cols, other.cells)
@@ -0,0 +1,87 @@
+import numpy as np
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+from Data.Grid import GEM
+from Data.Grid import ZERO
+from Data.Grid import EIGHT
+
+# Problems a solved grid can have, in the order they are reported
+ISSUES = ["altered_hints", "changed_cells", "undecided", "wrong_counts"]
+
+# Cells listed per grid in a report, beyond that only the counts are kept
+MAX_EXAMPLES = 5
+
+# Checks solved grids against their puzzles with whole-array NumPy operations instead of
+# clause by clause: grids of the same shape are stacked into one (n, rows, cols) array and
+# the traps around every cell of every grid come from one 3x3 box sum over that stack.
+# A solved grid is valid when
+#   - every hint is unchanged (altered_hints),
+#   - every cell decided in the puzzle ('T'/'G') is unchanged (changed_cells),
+#   - every blank became 'T' or 'G' (undecided),
+#   - every hint has exactly its number of traps around it (wrong_counts).
+def stack_cells(grids):
+    return np.stack([np.frombuffer(bytes(grid.cells), dtype=np.uint8).reshape(grid.rows, grid.cols) for grid in grids])
+
+def neighbour_traps(traps):
+    # traps: (n, rows, cols) of 0/1 -> the number of traps among the 8 neighbours of every cell
+    padded = np.pad(traps, ((0, 0), (1, 1), (1, 1)))
+    rows, cols = traps.shape[1], traps.shape[2]
+
+    counts = np.zeros(traps.shape, dtype=np.uint8)
+    for dr in range(3):
+        for dc in range(3):
+            counts += padded[:, dr:dr + rows, dc:dc + cols]
+    return counts - traps
+
+def check_stack(inputs, outputs):
+    # Boolean (n, rows, cols) masks of every issue
+    hints = (inputs >= ZERO) & (inputs <= EIGHT)
+    blanks = inputs == UNKNOWN
+    counts = neighbour_traps((outputs == TRAP).view(np.uint8))
+
+    return {
+        "altered_hints": hints & (outputs != inputs),
+        "changed_cells": ~hints & ~blanks & (outputs != inputs),
+        "undecided": blanks & (outputs != TRAP) & (outputs != GEM),
+        "wrong_counts": hints & (counts != inputs - ZERO),
+    }
+
+def report_stack(ids, inputs, outputs):
+    masks = check_stack(inputs, outputs)
+    totals = {issue: masks[issue].sum(axis=(1, 2)) for issue in ISSUES}
+    invalid = np.logical_or.reduce([totals[issue] > 0 for issue in ISSUES])
+
+    reports = []
+    for k, puzzle_id in enumerate(ids):
+        report = {"id": puzzle_id, "valid": not bool(invalid[k]), "cells": int(inputs[k].size)}
+        if invalid[k]:
+            report["issues"] = {issue: int(totals[issue][k]) for issue in ISSUES if totals[issue][k]}
+            report["examples"] = [[int(row), int(col), issue] for issue in ISSUES
+                                  for row, col in np.argwhere(masks[issue][k])[:MAX_EXAMPLES]][:MAX_EXAMPLES]
+        reports.append(report)
+    return reports
+
+def validate_grids(pairs):
+    # pairs: (id, puzzle grid, solved grid). Returns one report per pair, in the same order
+    reports = [None] * len(pairs)
+    shapes = {}
+
+    for position, (puzzle_id, grid, solved_grid) in enumerate(pairs):
+        if (grid.rows, grid.cols) != (solved_grid.rows, solved_grid.cols):
+            reports[position] = {"id": puzzle_id, "valid": False, "cells": grid.rows * grid.cols,
+                                 "issues": {"shape": 1},
+                                 "examples": [[solved_grid.rows, solved_grid.cols, "shape"]]}
+        else:
+            shapes.setdefault((grid.rows, grid.cols), []).append(position)
+
+    for positions in shapes.values():
+        ids = [pairs[position][0] for position in positions]
+        inputs = stack_cells([pairs[position][1] for position in positions])
+        outputs = stack_cells([pairs[position][2] for position in positions])
+        for position, report in zip(positions, report_stack(ids, inputs, outputs)):
+            reports[position] = report
+
+    return reports
+
+def validate_grid(grid, solved_grid):
+    return validate_grids([(None, grid, solved_grid)])[0]["valid"]
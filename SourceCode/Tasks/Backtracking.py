@@ -1,11 +1,18 @@
 import time
 from Data.DataHandler import check_cnf
 from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Tasks.Budget import BudgetExceeded
+from Tasks.Budget import unknown_result
+from Tasks.Stats import NULL_STATS
 
-def back_tracking_SAT(cnfs, current_row, literals):
+def back_tracking_SAT(cnfs, current_row, literals, stats=None, budget=None):
     if current_row == len(cnfs):
         return [], True
 
+    if budget is not None:
+        budget.check()
+
     clause = cnfs[current_row]
     satisfied = False
     undecided_literals = []
@@ -19,14 +26,17 @@ def back_tracking_SAT(cnfs, current_row, literals):
             undecided_literals.append(lit)
     
     if satisfied:
-        return back_tracking_SAT(cnfs, current_row + 1, literals)
+        return back_tracking_SAT(cnfs, current_row + 1, literals, stats, budget)
     
     if undecided_literals:
         for lit in undecided_literals:            
+            if stats is not None:
+                stats["decisions"] += 1
+
             literals[lit] = True
             literals[-lit] = False
 
-            res, solvable = back_tracking_SAT(cnfs, current_row + 1, literals)
+            res, solvable = back_tracking_SAT(cnfs, current_row + 1, literals, stats, budget)
             if solvable:
                 res += [lit]
                 return res, True
@@ -34,7 +44,7 @@ def back_tracking_SAT(cnfs, current_row, literals):
             literals[lit] = False
             literals[-lit] = True
 
-            res, solvable = back_tracking_SAT(cnfs, current_row + 1, literals)
+            res, solvable = back_tracking_SAT(cnfs, current_row + 1, literals, stats, budget)
             if solvable:
                 res += [-lit]
                 return res, True
@@ -46,15 +56,181 @@ def back_tracking_SAT(cnfs, current_row, literals):
     else:        
         return [], False 
     
-def btSat(grid, cnfs):
+# Iterative DPLL: explicit trail and decision stack, two watched literals per clause
+# and chronological backtracking. Memory is O(clauses) and there is no recursion,
+# so the depth of the search does not depend on len(cnfs).
+# When the budget runs out the result is unknown: (literals forced by propagation, None).
+def dpll_SAT(cnfs, stats, budget=None):
+    clauses = []
+    num_vars = 0
+    for clause in cnfs:
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause for lit in clause):
+            continue
+        if not clause:
+            return [], False
+        clauses.append(clause)
+        num_vars = max(num_vars, max(abs(lit) for lit in clause))
+
+    # value[v]: 1 = true, -1 = false, 0 = unassigned
+    value = [0] * (num_vars + 1)
+    # watches[lit + num_vars]: indices of the clauses watching lit
+    watches = [[] for _ in range(2 * num_vars + 1)]
+    occurrences = [0] * (num_vars + 1)
+    polarity = set()
+    units = []
+
+    for index, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences[abs(lit)] += 1
+            polarity.add(lit)
+
+        if len(clause) == 1:
+            units.append(clause[0])
+        else:
+            watches[clause[0] + num_vars].append(index)
+            watches[clause[1] + num_vars].append(index)
+
+    trail = []
+
+    def assign(lit):
+        value[abs(lit)] = 1 if lit > 0 else -1
+        trail.append(lit)
+
+    # Root level: unit clauses, then pure literals
+    for lit in units:
+        current = value[abs(lit)] if lit > 0 else -value[abs(lit)]
+        if current == -1:
+            return [], False
+        if current == 0:
+            assign(lit)
+
+    for var in range(1, num_vars + 1):
+        if value[var] == 0 and occurrences[var] > 0:
+            if var not in polarity:
+                assign(-var)
+            elif -var not in polarity:
+                assign(var)
+
+    # Decision order: most constrained cells first
+    order = sorted(range(1, num_vars + 1), key=lambda var: -occurrences[var])
+    order = [var for var in order if occurrences[var] > 0]
+
+    decisions = []  # [trail position, decision literal, already flipped, order position]
+    queue_head = 0
+    next_position = 0
+    propagations = 0
+
+    while True:
+        # Unit propagation over the not yet processed part of the trail
+        conflict = False
+        while queue_head < len(trail) and not conflict:
+            false_lit = -trail[queue_head]
+            queue_head += 1
+
+            watch_list = watches[false_lit + num_vars]
+            i = j = 0
+            while i < len(watch_list):
+                index = watch_list[i]
+                i += 1
+                clause = clauses[index]
+
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                first = clause[0]
+                first_value = value[abs(first)] if first > 0 else -value[abs(first)]
+                if first_value == 1:
+                    watch_list[j] = index
+                    j += 1
+                    continue
+
+                moved = False
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (value[abs(lit)] if lit > 0 else -value[abs(lit)]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[lit + num_vars].append(index)
+                        moved = True
+                        break
+                if moved:
+                    continue
+
+                watch_list[j] = index
+                j += 1
+                if first_value == -1:
+                    conflict = True
+                    while i < len(watch_list):
+                        watch_list[j] = watch_list[i]
+                        i += 1
+                        j += 1
+                else:
+                    assign(first)
+                    propagations += 1
+            del watch_list[j:]
+
+        if conflict:
+            stats["conflicts"] += 1
+
+            while decisions and decisions[-1][2]:
+                decisions.pop()
+            if not decisions:
+                stats["propagations"] += propagations
+                return [], False
+
+            start, lit, _, position = decisions.pop()
+            for assigned in trail[start:]:
+                value[abs(assigned)] = 0
+            del trail[start:]
+
+            decisions.append([start, -lit, True, position])
+            assign(-lit)
+            queue_head = start
+            next_position = position
+            stats["backtracks"] += 1
+            continue
+
+        while next_position < len(order) and value[order[next_position]] != 0:
+            next_position += 1
+        if next_position == len(order):
+            break
+
+        if budget is not None and budget.expired():
+            stats["propagations"] += propagations
+            return unknown_result(cnfs)
+
+        # Cells are more often gems than traps, so try "not a trap" first
+        lit = -order[next_position]
+        decisions.append([len(trail), lit, False, next_position])
+        assign(lit)
+        stats["decisions"] += 1
+
+    stats["propagations"] += propagations
+    return [var if value[var] == 1 else -var for var in range(1, num_vars + 1)], True
+
+def new_search_stats():
+    return {"decisions": 0, "propagations": 0, "conflicts": 0, "backtracks": 0}
+
+def btSat(grid, cnfs, engine="dpll", budget=None, run_stats=NULL_STATS):
     starting_row = 0
     literals = {}
+    stats = new_search_stats()
 
     start_time = time.time()
-    result, solvable = back_tracking_SAT(cnfs, starting_row, literals)
+    with run_stats.phase("search"):
+        if engine == "recursive":
+            try:
+                result, solvable = back_tracking_SAT(cnfs, starting_row, literals, stats, budget)
+            except BudgetExceeded:
+                result, solvable = unknown_result(cnfs)
+        else:
+            result, solvable = dpll_SAT(cnfs, stats, budget)
     end_time = time.time()
 
     total_time = end_time - start_time
 
-    grid = fill_result(grid, result)
+    run_stats.update(stats)
+
+    with run_stats.phase("fill"):
+        grid = fill_result(grid, result) if solvable is not None else fill_partial(grid, result)
     return grid, solvable, total_time
\ No newline at end of file
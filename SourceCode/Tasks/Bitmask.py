@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+import numpy as np
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+from Tasks.Budget import BudgetExceeded
+from Tasks.Budget import SearchTooLarge
+
+# Assignments checked per NumPy call, and the smallest search worth a process pool
+CHUNK_SIZE = 1 << 18
+PARALLEL_THRESHOLD = 1 << 24
+SLICES_PER_WORKER = 16
+# Seconds between budget checks while waiting for the search workers, and what a worker
+# returns when its own budget check stopped it
+BUDGET_POLL = 0.1
+BUDGET_STOPPED = -2
+
+def popcount(values):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (values * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+def frontier_components(grid):
+    # Groups the unknown cells next to a hint into independent components. Each component
+    # is (cells, hints) where hints are (bitmask over the component's cells, traps still needed).
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    hints = []
+    for index in range(grid.rows * grid.cols):
+        if not grid.is_hint(index):
+            continue
+
+        value = grid.hint(index)
+        unknowns = []
+        for neighbour in grid.neighbours(index):
+            if grid.cells[neighbour] == UNKNOWN:
+                unknowns.append(neighbour + 1)
+            elif grid.cells[neighbour] == TRAP:
+                value -= 1
+
+        # Hints already over-satisfied by traps, or needing more traps than they have
+        # unknowns, cannot hold (and would not fit the uint8 counts of search_range)
+        if value < 0 or value > len(unknowns):
+            return None
+        if not unknowns:
+            continue
+
+        for cell in unknowns:
+            parent.setdefault(cell, cell)
+        for cell in unknowns[1:]:
+            parent[find(cell)] = find(unknowns[0])
+        hints.append((unknowns, value))
+
+    components = {}
+    for unknowns, value in hints:
+        components.setdefault(find(unknowns[0]), []).append((unknowns, value))
+
+    result = []
+    for component_hints in components.values():
+        cells = sorted({cell for unknowns, _ in component_hints for cell in unknowns})
+        position = {cell: bit for bit, cell in enumerate(cells)}
+        masks = [sum(1 << position[cell] for cell in unknowns) for unknowns, _ in component_hints]
+        result.append((cells, masks, [value for _, value in component_hints]))
+
+    return result
+
+def search_range(masks, values, start, stop, stop_event=None, budget=None):
+    # Returns the first assignment in [start, stop) whose trap count under every hint mask
+    # equals the hint, or -1. Bit b of an assignment is the b-th cell of the component.
+    masks = np.array(masks, dtype=np.uint64)
+    values = np.array(values, dtype=np.uint8)
+
+    # Hints that cover few cells reject the most candidates per operation, check them first
+    order = np.argsort(popcount(masks), kind="stable")
+    masks, values = masks[order], values[order]
+
+    for chunk_start in range(start, stop, CHUNK_SIZE):
+        if stop_event is not None and stop_event.is_set():
+            return -1
+        if budget is not None:
+            budget.check()
+
+        candidates = np.arange(chunk_start, min(stop, chunk_start + CHUNK_SIZE), dtype=np.uint64)
+        for mask, value in zip(masks, values):
+            candidates = candidates[popcount(candidates & mask) == value]
+            if candidates.size == 0:
+                break
+
+        if candidates.size:
+            return int(candidates[0])
+
+    return -1
+
+def init_search_worker(stop_event, budget):
+    global search_stop_event, search_budget
+    search_stop_event = stop_event
+    search_budget = budget
+
+def search_slice(masks, values, start, stop):
+    try:
+        found = search_range(masks, values, start, stop, search_stop_event, search_budget)
+    except BudgetExceeded as error:
+        # Reported to the parent, which must not take the stopped slice for an exhausted one
+        return BUDGET_STOPPED, str(error)
+    if found != -1:
+        search_stop_event.set()
+    return found
+
+def parallel_search(masks, values, total, workers, budget=None):
+    stop_event = multiprocessing.Event()
+    step = -(-total // (workers * SLICES_PER_WORKER))
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_search_worker, initargs=(stop_event, budget))
+    try:
+        pending = {executor.submit(search_slice, masks, values, start, min(total, start + step))
+                   for start in range(0, total, step)}
+
+        while pending:
+            done, pending = wait(pending, timeout=BUDGET_POLL if budget is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                found = future.result()
+                if isinstance(found, tuple) and found[0] == BUDGET_STOPPED:
+                    budget.reason = found[1]
+                    raise BudgetExceeded(found[1])
+                if found != -1:
+                    return found
+            if budget is not None:
+                budget.check()
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return -1
+
+# Exhaustive search over packed bitmask assignments of the unknown cells: the hints of each
+# independent component are checked a whole chunk of assignments at a time with NumPy
+# popcounts, stopping at the first assignment that matches every hint.
+def bitmask_SAT(grid, workers=None, budget=None):
+    components = frontier_components(grid)
+    if components is None:
+        return [], False
+
+    workers = workers or os.cpu_count() or 1
+    result = []
+
+    for cells, masks, values in components:
+        if len(cells) > 63:
+            raise SearchTooLarge(f"a component with {len(cells)} unknown cells is too large for bruteforce")
+
+        total = 1 << len(cells)
+        if workers > 1 and total >= PARALLEL_THRESHOLD:
+            found = parallel_search(masks, values, total, workers, budget)
+        else:
+            found = search_range(masks, values, 0, total, budget=budget)
+
+        if found == -1:
+            return [], False
+
+        result += [cell if found >> bit & 1 else -cell for bit, cell in enumerate(cells)]
+
+    return result, True
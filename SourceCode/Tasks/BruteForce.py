@@ -2,10 +2,17 @@ import itertools
 import time
 from Data.DataHandler import check_cnf
 from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Tasks.Budget import BudgetExceeded
+from Tasks.Budget import unknown_result
+from Tasks.Stats import NULL_STATS
 
-def brute_force_SAT(cnfs, current_row, literals, solvable=True):
+def brute_force_SAT(cnfs, current_row, literals, solvable=True, budget=None, stats=None):
     if current_row == len(cnfs):
         return [], solvable
+
+    if budget is not None:
+        budget.check()
     
     previous_state = solvable
 
@@ -26,6 +33,9 @@ def brute_force_SAT(cnfs, current_row, literals, solvable=True):
     position = 0    
     if undecided_literals: 
         for i in range(len(list_unit_clauses)):
+            if stats is not None:
+                stats["decisions"] += 1
+
             for lit in list_unit_clauses[i]:
                 literals[lit] = True
                 literals[-lit] = False 
@@ -34,7 +44,7 @@ def brute_force_SAT(cnfs, current_row, literals, solvable=True):
 
             next_state = True if previous_state and current_state else False
 
-            additional, solvable = brute_force_SAT(cnfs, current_row + 1, literals, next_state)
+            additional, solvable = brute_force_SAT(cnfs, current_row + 1, literals, next_state, budget, stats)
 
             if solvable: 
                 position = i
@@ -48,7 +58,7 @@ def brute_force_SAT(cnfs, current_row, literals, solvable=True):
         
         next_state = True if previous_state and current_state else False
 
-        additional, solvable = brute_force_SAT(cnfs, current_row + 1, literals, next_state)    
+        additional, solvable = brute_force_SAT(cnfs, current_row + 1, literals, next_state, budget, stats)    
 
     if solvable:
         result = []
@@ -61,16 +71,29 @@ def brute_force_SAT(cnfs, current_row, literals, solvable=True):
     else:
         return [], False
 
-def bfSat(grid, cnfs):
+def bfSat(grid, cnfs, engine="recursive", workers=None, budget=None, stats=NULL_STATS):
     starting_row = 0
     literals = {}
     estimated_result = True
+    search_stats = {"decisions": 0}
 
     start_time = time.time()
-    result, real_result = brute_force_SAT(cnfs, starting_row, literals, estimated_result)
+    with stats.phase("search"):
+        try:
+            if engine == "bitmask":
+                # NumPy is only needed by this engine, so it is only imported for it
+                from Tasks.Bitmask import bitmask_SAT
+                result, real_result = bitmask_SAT(grid, workers, budget)
+            else:
+                result, real_result = brute_force_SAT(cnfs, starting_row, literals, estimated_result, budget, search_stats)
+        except BudgetExceeded:
+            result, real_result = unknown_result(cnfs)
     end_time = time.time()
 
     total_time = end_time - start_time
+    if engine != "bitmask":
+        stats.update(search_stats)
     
-    grid = fill_result(grid, result)
+    with stats.phase("fill"):
+        grid = fill_result(grid, result) if real_result is not None else fill_partial(grid, result)
     return grid, real_result, total_time
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import time
+
+# The clock is read on every check; resident memory only every this many checks
+MEMORY_CHECK_INTERVAL = 1024
+
+class BudgetExceeded(Exception):
+    pass
+
+# A search that would never finish whatever the budget, e.g. 2^64 assignments for the bitmask
+# brute force; the run is reported as unknown with the message
+class SearchTooLarge(ValueError):
+    pass
+
+def current_memory():
+    # Resident set size in bytes; the peak RSS where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# Time and memory limits of one solver run. Solvers poll it cooperatively: loops call
+# expired() and stop with an "unknown" result, recursive searches call check(), which raises
+# BudgetExceeded so the whole recursion unwinds at once. The deadline is on the monotonic
+# clock, so a budget handed to a worker process keeps meaning the same instant.
+class Budget:
+    def __init__(self, timeout=None, max_memory=None):
+        # timeout: seconds, max_memory: bytes; None means no limit
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.max_memory = max_memory
+        self.checks = 0
+        self.reason = None
+
+    def expired(self):
+        if self.reason is not None:
+            return True
+
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = "time"
+        elif self.max_memory is not None:
+            self.checks += 1
+            if self.checks % MEMORY_CHECK_INTERVAL == 1 and current_memory() > self.max_memory:
+                self.reason = "memory"
+
+        return self.reason is not None
+
+    def check(self):
+        if self.expired():
+            raise BudgetExceeded(self.reason)
+
+    def remaining(self):
+        # Seconds left before the deadline, None without a time limit
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+def make_budget(timeout=None, max_memory=None):
+    # None when there is nothing to enforce, so solvers skip the checks entirely
+    if timeout is None and max_memory is None:
+        return None
+    return Budget(timeout, max_memory)
+
+# The "unknown" answer of a solver that ran out of budget: the literals forced by unit
+# propagation alone, i.e. the cells proven safe or trapped whatever the search would find.
+# Returns (literals, None), or ([], False) when propagation already hits a conflict.
+def unknown_result(cnfs):
+    value = {}
+    watching = {}
+    queue = []
+
+    for index, clause in enumerate(cnfs):
+        if not clause:
+            return [], False
+        for lit in clause:
+            watching.setdefault(-lit, []).append(index)
+        if len(clause) == 1:
+            queue.append(clause[0])
+
+    while queue:
+        lit = queue.pop()
+        if value.get(abs(lit)) == (lit > 0):
+            continue
+        if abs(lit) in value:
+            return [], False
+        value[abs(lit)] = lit > 0
+
+        # Clauses that just lost a literal may have become unit or empty
+        for index in watching.get(lit, ()):
+            unassigned = None
+            open_literals = 0
+            for other in cnfs[index]:
+                if abs(other) not in value:
+                    unassigned = other
+                    open_literals += 1
+                elif value[abs(other)] == (other > 0):
+                    break
+            else:
+                if open_literals == 0:
+                    return [], False
+                if open_literals == 1:
+                    queue.append(unassigned)
+
+    return [var if is_true else -var for var, is_true in value.items()], None
@@ -0,0 +1,394 @@
+import heapq
+import time
+from array import array
+from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Tasks.Stats import NULL_STATS
+
+VAR_DECAY = 0.95
+CLAUSE_DECAY = 0.999
+RESTART_BASE = 100
+RESCALE_LIMIT = 1e100
+
+def luby(i):
+    # i-th element (0-based) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+
+    return 1 << seq
+
+# Conflict-driven clause learning: two watched literals, 1-UIP conflict analysis with
+# non-chronological backjumping, VSIDS variable activity with phase saving, Luby restarts
+# and activity-based deletion of learned clauses.
+#
+# Literals are stored encoded (2 * var + sign) so negation is "x ^ 1" and a literal's value
+# is one array lookup. The clause database is array-backed: every literal of every clause
+# lives in one flat array('i') and a clause is just an id into the start/size arrays.
+def cdcl_SAT(cnfs, stats, budget=None):
+    lits = array('i')
+    start = array('i')
+    size = array('i')
+    learnt = bytearray()
+    deleted = bytearray()
+    clause_activity = array('d')
+    lbd = array('i')
+
+    units = []
+    num_vars = 0
+    # Only variables of some clause are decided on; the others (hint cells, or every cell
+    # under an encoding that numbers its own variables past them) stay false
+    variables = set()
+
+    for clause in cnfs:
+        clause = set(clause)
+        if not clause:
+            return [], False
+        clause_variables = {abs(lit) for lit in clause}
+        if len(clause_variables) < len(clause):
+            # Holds both a literal and its negation
+            continue
+
+        variables |= clause_variables
+        num_vars = max(num_vars, max(clause_variables))
+        if len(clause) == 1:
+            units.append(next(iter(clause)))
+            continue
+
+        start.append(len(lits))
+        size.append(len(clause))
+        lits.extend(2 * abs(lit) + (lit < 0) for lit in clause)
+        learnt.append(0)
+        deleted.append(0)
+        clause_activity.append(0.0)
+        lbd.append(0)
+
+    # lit_value[x]: 1 = true, -1 = false, 0 = unassigned, indexed by encoded literal
+    lit_value = array('b', [0]) * (2 * num_vars + 2)
+    level = array('i', [0]) * (num_vars + 1)
+    reason = array('i', [-1]) * (num_vars + 1)
+    activity = array('d', [0.0]) * (num_vars + 1)
+    saved_phase = bytearray([1]) * (num_vars + 1)  # 1 = negative, cells are usually gems
+    seen = bytearray(num_vars + 1)
+    watches = [[] for _ in range(2 * num_vars + 2)]
+
+    for cid in range(len(start)):
+        s = start[cid]
+        watches[lits[s]].append(cid)
+        watches[lits[s + 1]].append(cid)
+        for k in range(s, s + size[cid]):
+            activity[lits[k] >> 1] += 1.0
+
+    trail = array('i')
+    trail_lim = []
+
+    def assign(x, from_clause):
+        lit_value[x] = 1
+        lit_value[x ^ 1] = -1
+        level[x >> 1] = len(trail_lim)
+        reason[x >> 1] = from_clause
+        trail.append(x)
+
+    for lit in units:
+        x = 2 * abs(lit) + (lit < 0)
+        if lit_value[x] == -1:
+            return [], False
+        if lit_value[x] == 0:
+            assign(x, -1)
+
+    variables = sorted(variables)
+    heap = [(-activity[var], var) for var in variables]
+    heapq.heapify(heap)
+
+    var_inc = 1.0
+    clause_inc = 1.0
+    queue_head = 0
+    conflicts = 0
+    decisions = 0
+    propagations = 0
+    restarts = 0
+    backjumps = 0
+    learned_count = 0
+    deleted_count = 0
+    wasted = 0
+
+    restart_limit = RESTART_BASE * luby(0)
+    conflicts_since_restart = 0
+    max_learnts = max(len(start) // 3, 2000)
+    num_learnts = 0
+
+    def cancel_until(target_level):
+        if len(trail_lim) <= target_level:
+            return
+        stop = trail_lim[target_level]
+        for k in range(len(trail) - 1, stop - 1, -1):
+            x = trail[k]
+            var = x >> 1
+            saved_phase[var] = x & 1
+            lit_value[x] = 0
+            lit_value[x ^ 1] = 0
+            reason[var] = -1
+            heapq.heappush(heap, (-activity[var], var))
+        del trail[stop:]
+        del trail_lim[target_level:]
+
+    def rebuild_heap():
+        heap[:] = [(-activity[var], var) for var in variables if lit_value[2 * var] == 0]
+        heapq.heapify(heap)
+
+    while True:
+        # Unit propagation
+        conflict = -1
+        while queue_head < len(trail):
+            false_lit = trail[queue_head] ^ 1
+            queue_head += 1
+
+            watch_list = watches[false_lit]
+            i = j = 0
+            end = len(watch_list)
+            while i < end:
+                cid = watch_list[i]
+                i += 1
+                if deleted[cid]:
+                    continue
+
+                s = start[cid]
+                if lits[s] == false_lit:
+                    lits[s] = lits[s + 1]
+                    lits[s + 1] = false_lit
+
+                first = lits[s]
+                if lit_value[first] == 1:
+                    watch_list[j] = cid
+                    j += 1
+                    continue
+
+                moved = False
+                for k in range(s + 2, s + size[cid]):
+                    x = lits[k]
+                    if lit_value[x] != -1:
+                        lits[s + 1] = x
+                        lits[k] = false_lit
+                        watches[x].append(cid)
+                        moved = True
+                        break
+                if moved:
+                    continue
+
+                watch_list[j] = cid
+                j += 1
+                if lit_value[first] == -1:
+                    conflict = cid
+                    while i < end:
+                        watch_list[j] = watch_list[i]
+                        i += 1
+                        j += 1
+                else:
+                    assign(first, cid)
+                    propagations += 1
+            del watch_list[j:]
+
+            if conflict != -1:
+                queue_head = len(trail)
+                break
+
+        if conflict != -1:
+            conflicts += 1
+            conflicts_since_restart += 1
+            if not trail_lim:
+                break
+
+            # 1-UIP conflict analysis
+            current_level = len(trail_lim)
+            learnt_clause = [0]
+            path_count = 0
+            p = -1
+            index = len(trail) - 1
+            confl = conflict
+
+            while True:
+                if learnt[confl]:
+                    clause_activity[confl] += clause_inc
+                    if clause_activity[confl] > RESCALE_LIMIT:
+                        for cid in range(len(start)):
+                            clause_activity[cid] *= 1.0 / RESCALE_LIMIT
+                        clause_inc *= 1.0 / RESCALE_LIMIT
+
+                s = start[confl]
+                for k in range(s if p == -1 else s + 1, s + size[confl]):
+                    q = lits[k]
+                    var = q >> 1
+                    if not seen[var] and level[var] > 0:
+                        activity[var] += var_inc
+                        if activity[var] > RESCALE_LIMIT:
+                            for v in range(1, num_vars + 1):
+                                activity[v] *= 1.0 / RESCALE_LIMIT
+                            var_inc *= 1.0 / RESCALE_LIMIT
+                            rebuild_heap()
+                        elif lit_value[2 * var] == 0:
+                            heapq.heappush(heap, (-activity[var], var))
+
+                        seen[var] = 1
+                        if level[var] >= current_level:
+                            path_count += 1
+                        else:
+                            learnt_clause.append(q)
+
+                while not seen[trail[index] >> 1]:
+                    index -= 1
+                p = trail[index]
+                index -= 1
+                confl = reason[p >> 1]
+                seen[p >> 1] = 0
+                path_count -= 1
+                if path_count == 0:
+                    break
+
+            learnt_clause[0] = p ^ 1
+
+            # Drop literals implied by the rest of the learned clause
+            marked = learnt_clause[1:]
+            minimized = [learnt_clause[0]]
+            for q in marked:
+                r = reason[q >> 1]
+                if r == -1:
+                    minimized.append(q)
+                    continue
+                s = start[r]
+                for k in range(s + 1, s + size[r]):
+                    var = lits[k] >> 1
+                    if not seen[var] and level[var] > 0:
+                        minimized.append(q)
+                        break
+            for q in marked:
+                seen[q >> 1] = 0
+            learnt_clause = minimized
+
+            # Backjump to the second highest decision level in the clause
+            backjump_level = 0
+            if len(learnt_clause) > 1:
+                best = 1
+                for k in range(2, len(learnt_clause)):
+                    if level[learnt_clause[k] >> 1] > level[learnt_clause[best] >> 1]:
+                        best = k
+                learnt_clause[1], learnt_clause[best] = learnt_clause[best], learnt_clause[1]
+                backjump_level = level[learnt_clause[1] >> 1]
+
+            cancel_until(backjump_level)
+            queue_head = len(trail)
+            backjumps += 1
+
+            if len(learnt_clause) == 1:
+                assign(learnt_clause[0], -1)
+            else:
+                cid = len(start)
+                start.append(len(lits))
+                size.append(len(learnt_clause))
+                lits.extend(learnt_clause)
+                learnt.append(1)
+                deleted.append(0)
+                clause_activity.append(clause_inc)
+                lbd.append(len({level[x >> 1] for x in learnt_clause}))
+                watches[learnt_clause[0]].append(cid)
+                watches[learnt_clause[1]].append(cid)
+                assign(learnt_clause[0], cid)
+                num_learnts += 1
+                learned_count += 1
+
+            var_inc /= VAR_DECAY
+            clause_inc /= CLAUSE_DECAY
+            continue
+
+        if conflicts_since_restart >= restart_limit:
+            restarts += 1
+            conflicts_since_restart = 0
+            restart_limit = RESTART_BASE * luby(restarts)
+            cancel_until(0)
+            queue_head = len(trail)
+            continue
+
+        if num_learnts - len(trail) >= max_learnts:
+            # Keep glue clauses (LBD <= 2), binaries and reasons; drop the less active half of the rest
+            candidates = [cid for cid in range(len(start))
+                          if learnt[cid] and not deleted[cid] and size[cid] > 2 and lbd[cid] > 2]
+            candidates.sort(key=lambda cid: clause_activity[cid])
+            for cid in candidates[:len(candidates) // 2]:
+                first = lits[start[cid]]
+                if reason[first >> 1] == cid and lit_value[first] == 1:
+                    continue
+                deleted[cid] = 1
+                num_learnts -= 1
+                deleted_count += 1
+                wasted += size[cid]
+            max_learnts = int(max_learnts * 1.1)
+
+            if wasted * 2 > len(lits):
+                compacted = array('i')
+                for cid in range(len(start)):
+                    s = start[cid]
+                    start[cid] = len(compacted)
+                    if deleted[cid]:
+                        size[cid] = 0
+                    else:
+                        compacted.extend(lits[s:s + size[cid]])
+                lits = compacted
+                wasted = 0
+
+        if len(heap) > 10 * len(variables) + 1000:
+            rebuild_heap()
+
+        if budget is not None and budget.expired():
+            break
+
+        var = 0
+        while heap:
+            _, candidate = heapq.heappop(heap)
+            if lit_value[2 * candidate] == 0:
+                var = candidate
+                break
+        if var == 0:
+            break
+
+        decisions += 1
+        trail_lim.append(len(trail))
+        assign(2 * var + saved_phase[var], -1)
+
+    stats["decisions"] += decisions
+    stats["propagations"] += propagations
+    stats["conflicts"] += conflicts
+    stats["backtracks"] += backjumps
+    stats["restarts"] = stats.get("restarts", 0) + restarts
+    stats["learned"] = stats.get("learned", 0) + learned_count
+    stats["deleted"] = stats.get("deleted", 0) + deleted_count
+
+    if conflict != -1:
+        return [], False
+
+    if budget is not None and budget.reason is not None:
+        # Unknown: level 0 holds the units and everything learned to be forced so far
+        root = trail[:trail_lim[0]] if trail_lim else trail
+        return [-(x >> 1) if x & 1 else x >> 1 for x in root], None
+
+    return [var if lit_value[2 * var] == 1 else -var for var in range(1, num_vars + 1)], True
+
+def cdclSat(grid, cnfs, budget=None, run_stats=NULL_STATS):
+    stats = {"decisions": 0, "propagations": 0, "conflicts": 0, "backtracks": 0}
+
+    start_time = time.time()
+    with run_stats.phase("search"):
+        result, solvable = cdcl_SAT(cnfs, stats, budget)
+    end_time = time.time()
+
+    total_time = end_time - start_time
+
+    run_stats.update(stats)
+
+    with run_stats.phase("fill"):
+        grid = fill_result(grid, result) if solvable is not None else fill_partial(grid, result)
+    return grid, solvable, total_time
\ No newline at end of file
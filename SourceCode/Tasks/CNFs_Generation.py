@@ -1,40 +1,203 @@
+import collections
 import itertools
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
 
-def generate_CNF_s(grid):
-    clauses = []
-    for i in range(len(grid)):
-        for j in range(len(grid[i])):
-            if grid[i][j] != '_' and grid[i][j] != '0':
-                clauses += make_clauses(grid, i, j);
-    
-    unique_clauses = []
-    for clause in clauses:
-        if clause not in unique_clauses:
-            unique_clauses.append(clause)
+ENCODINGS = ["combinations", "seqcounter", "totalizer", "cardnetwork"]
 
-    clauses = unique_clauses        
+def iter_CNF_s(grid, encoding="combinations"):
+    # Yields every clause once, as a tuple, without building the whole CNF. Duplicates
+    # are detected on the sorted literals, but each clause keeps the literal order of
+    # make_clauses, which the clause-by-clause solvers are sensitive to.
+    # A clause over cells only is made by a hint whose 3x3 block holds all of its cells,
+    # so a duplicate can only come from a hint at most two rows away: remembering the
+    # clauses of the last three hint rows is enough to drop every duplicate.
+    number_of_cells = grid.rows * grid.cols
 
-    return clauses
+    # Auxiliary variables of the cardinality encodings are numbered after the cells,
+    # so cell (i, j) keeps the variable i * cols + j + 1 that fill_result expects
+    new_var = itertools.count(number_of_cells + 1).__next__
 
-def make_clauses(grid, row , col):
-    number_of_rows = len(grid)
-    number_of_cols = len(grid[row])
-    integer_value = int(grid[row][col])
+    recent = collections.deque(maxlen=3)
+    for i in range(grid.rows):
+        seen = set()
+        recent.append(seen)
+
+        for j in range(grid.cols):
+            # Cells already decided (written 'T' or 'G') are not hints
+            if grid.is_hint(grid.index(i, j)):
+                for clause in make_clauses(grid, i, j, encoding, new_var):
+                    clause = tuple(clause)
+                    key = tuple(sorted(clause))
+
+                    if key and max(-key[0], key[-1]) > number_of_cells:
+                        # Clauses with fresh auxiliary variables cannot repeat
+                        yield clause
+                    elif not any(key in previous for previous in recent):
+                        seen.add(key)
+                        yield clause
+
+def stream_CNF_s(grid, sink, encoding="combinations"):
+    # Feeds the clauses straight into a consumer such as Solver.add_clause
+    number_of_clauses = 0
+    for clause in iter_CNF_s(grid, encoding):
+        sink(clause)
+        number_of_clauses += 1
+
+    return number_of_clauses
+
+def generate_CNF_s(grid, encoding="combinations"):
+    return list(iter_CNF_s(grid, encoding))
+
+def make_clauses(grid, row , col, encoding="combinations", new_var=None):
+    index = grid.index(row, col)
+    integer_value = grid.hint(index)
+    cells = grid.cells
 
     atomic_sentence = []
 
-    for i in range(max(0, row - 1), min(number_of_rows, row + 2)):
-        for j in range(max(0, col - 1), min(number_of_cols, col + 2)):
-            if grid[i][j] == '_':
-                atomic_sentence.append(i * number_of_cols + j + 1)            
+    # Neighbours come in row-major order, the order the solvers were tuned on
+    for neighbour in grid.neighbours(index):
+        if cells[neighbour] == UNKNOWN:
+            atomic_sentence.append(neighbour + 1)
+        elif cells[neighbour] == TRAP:
+            integer_value -= 1
 
     number_of_atomic_senteces = len(atomic_sentence)
-          
-    cnf = []      
-    at_most = list(itertools.combinations(atomic_sentence, integer_value + 1))
-    cnf += [[-i for i in clause] for clause in at_most]
-
-    at_least = list(itertools.combinations(atomic_sentence, number_of_atomic_senteces + 1 - integer_value))
-    cnf += [[i for i in clause] for clause in at_least]
-    
-    return cnf
\ No newline at end of file
+
+    if integer_value < 0:
+        # More known traps around the hint than it allows
+        yield []
+        return
+
+    if encoding != "combinations":
+        yield from exactly_k(atomic_sentence, integer_value, encoding, new_var)
+        return
+
+    for clause in itertools.combinations(atomic_sentence, integer_value + 1):
+        yield [-i for i in clause]
+
+    # More traps than unknown neighbours gives the empty clause
+    yield from itertools.combinations(atomic_sentence, max(0, number_of_atomic_senteces + 1 - integer_value))
+
+def exactly_k(literals, k, encoding, new_var):
+    n = len(literals)
+    if k < 0 or k > n:
+        return [[]]
+
+    if encoding == "seqcounter":
+        return at_most_k_seqcounter(literals, k, new_var) + at_most_k_seqcounter([-lit for lit in literals], n - k, new_var)
+    elif encoding == "totalizer":
+        outputs, cnf = totalizer(literals, new_var)
+    elif encoding == "cardnetwork":
+        outputs, cnf = sorting_network(literals, new_var)
+    else:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    # outputs[i] is true iff at least i + 1 of the literals are true
+    if k > 0:
+        cnf.append([outputs[k - 1]])
+    if k < n:
+        cnf.append([-outputs[k]])
+
+    return cnf
+
+# Sinz's sequential counter: s[i][j] means "at least j + 1 of literals[0..i] are true"
+def at_most_k_seqcounter(literals, k, new_var):
+    n = len(literals)
+    if k >= n:
+        return []
+    if k == 0:
+        return [[-lit] for lit in literals]
+
+    s = [[new_var() for _ in range(k)] for _ in range(n - 1)]
+
+    cnf = [[-literals[0], s[0][0]]]
+    cnf += [[-s[0][j]] for j in range(1, k)]
+
+    for i in range(1, n - 1):
+        cnf.append([-literals[i], s[i][0]])
+        cnf.append([-s[i - 1][0], s[i][0]])
+        for j in range(1, k):
+            cnf.append([-literals[i], -s[i - 1][j - 1], s[i][j]])
+            cnf.append([-s[i - 1][j], s[i][j]])
+        cnf.append([-literals[i], -s[i - 1][k - 1]])
+
+    cnf.append([-literals[n - 1], -s[n - 2][k - 1]])
+
+    return cnf
+
+# Totalizer (Bailleux & Boufkhad): a binary tree of unary adders, encoded in both directions
+def totalizer(literals, new_var):
+    if len(literals) <= 1:
+        return list(literals), []
+
+    half = len(literals) // 2
+    left, cnf = totalizer(literals[:half], new_var)
+    right, right_cnf = totalizer(literals[half:], new_var)
+    cnf += right_cnf
+
+    outputs = [new_var() for _ in range(len(left) + len(right))]
+
+    for i in range(len(left) + 1):
+        for j in range(len(right) + 1):
+            if i + j > 0:
+                clause = [outputs[i + j - 1]]
+                if i > 0:
+                    clause.append(-left[i - 1])
+                if j > 0:
+                    clause.append(-right[j - 1])
+                cnf.append(clause)
+
+            if i + j < len(outputs):
+                clause = [-outputs[i + j]]
+                if i < len(left):
+                    clause.append(left[i])
+                if j < len(right):
+                    clause.append(right[j])
+                cnf.append(clause)
+
+    return outputs, cnf
+
+# Cardinality network built from Batcher's odd-even merge sort: the outputs are the
+# literals sorted in decreasing order, each comparator encoded in both directions
+def sorting_network(literals, new_var):
+    cnf = []
+    literals = list(literals)
+    if not literals:
+        return [], cnf
+
+    width = 1
+    while width < len(literals):
+        width *= 2
+    if width > len(literals):
+        padding = new_var()
+        cnf.append([-padding])
+        literals += [padding] * (width - len(literals))
+
+    def comparator(a, b):
+        high, low = new_var(), new_var()
+        cnf.extend([[-a, high], [-b, high], [-a, -b, low],
+                    [a, b, -high], [a, -low], [b, -low]])
+        return high, low
+
+    def merge(a, b):
+        if len(a) == 1:
+            return list(comparator(a[0], b[0]))
+
+        odd = merge(a[0::2], b[0::2])
+        even = merge(a[1::2], b[1::2])
+
+        merged = [odd[0]]
+        for i in range(len(odd) - 1):
+            merged += comparator(even[i], odd[i + 1])
+        merged.append(even[-1])
+        return merged
+
+    def sort(block):
+        if len(block) <= 1:
+            return block
+        half = len(block) // 2
+        return merge(sort(block[:half]), sort(block[half:]))
+
+    return sort(literals), cnf
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Tasks.Engines import solve_model
+from Tasks.Budget import unknown_result
+from Tasks.Stats import NULL_STATS
+
+# Seconds between budget checks while waiting for the workers
+BUDGET_POLL = 0.1
+
+# Components are packed into tasks of roughly this many clauses, so a board with
+# hundreds of tiny islands does not pay one inter-process round trip per island
+CLAUSES_PER_TASK = 2000
+
+# Seconds a stopped worker gets to exit after SIGTERM before it is killed
+CANCEL_GRACE = 1.0
+
+def find(parent, var):
+    root = var
+    while parent[root] != root:
+        root = parent[root]
+
+    while parent[var] != root:
+        parent[var], var = root, parent[var]
+
+    return root
+
+def split_CNF_s(cnfs):
+    # Union-find over variables: two clauses end up in the same component iff
+    # they are linked by a chain of shared variables
+    parent = {}
+    for clause in cnfs:
+        for lit in clause:
+            parent.setdefault(abs(lit), abs(lit))
+
+        if len(clause) > 1:
+            root = find(parent, abs(clause[0]))
+            for lit in clause[1:]:
+                other = find(parent, abs(lit))
+                if other != root:
+                    parent[other] = root
+
+    components = {}
+    for clause in cnfs:
+        if not clause:
+            return [[clause]]
+        components.setdefault(find(parent, abs(clause[0])), []).append(clause)
+
+    # Largest first, so the longest searches start as early as possible
+    return sorted(components.values(), key=len, reverse=True)
+
+def solve_components(solution, components, backtracking_engine="dpll", budget=None):
+    model = []
+    for component in components:
+        result, solvable = solve_model(solution, component, backtracking_engine, budget)
+        if solvable is None:
+            # Only the literals proven in the unfinished component are kept
+            return result, None
+        if not solvable:
+            return [], False
+        model += result
+
+    return model, True
+
+def unknown_components(cnfs, partial):
+    # Unknown overall: what propagation proves on the whole CNF plus what a stopped engine proved
+    literals, solvable = unknown_result(cnfs)
+    if solvable is False:
+        return [], False
+    return literals + partial, None
+
+def pack_components(components):
+    tasks = []
+    current = []
+    current_size = 0
+
+    for component in components:
+        current.append(component)
+        current_size += len(component)
+        if current_size >= CLAUSES_PER_TASK:
+            tasks.append(current)
+            current = []
+            current_size = 0
+
+    if current:
+        tasks.append(current)
+
+    return tasks
+
+def stop_workers(executor):
+    # Cancelling futures only drops tasks that have not started; workers still solving a
+    # component are terminated (then killed) like the losing engines of a portfolio.
+    # The executor has no public handle on its workers: _processes is CPython's private
+    # pid -> Process map, and without it the running workers are left to finish on their own
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(CANCEL_GRACE)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+def decomposed_SAT(cnfs, solution, workers=None, backtracking_engine="dpll", budget=None):
+    components = split_CNF_s(cnfs)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(components) == 1:
+        model, solvable = solve_components(solution, components, backtracking_engine, budget)
+        if solvable is None:
+            return *unknown_components(cnfs, model), components
+        return model, solvable, components
+
+    model = []
+    executor = ProcessPoolExecutor(max_workers=workers)
+    finished = False
+    try:
+        pending = {executor.submit(solve_components, solution, task, backtracking_engine, budget)
+                   for task in pack_components(components)}
+
+        while pending:
+            done, pending = wait(pending, timeout=BUDGET_POLL if budget is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                result, solvable = future.result()
+                if solvable is False:
+                    # One unsatisfiable component makes the whole grid unsatisfiable
+                    return [], False, components
+                if solvable is None:
+                    return *unknown_components(cnfs, result), components
+                model += result
+
+            if pending and budget is not None and budget.expired():
+                return *unknown_components(cnfs, []), components
+        finished = True
+    finally:
+        if finished:
+            executor.shutdown(wait=False)
+        else:
+            stop_workers(executor)
+
+    return model, True, components
+
+def decomposed_solve(grid, cnfs, solution, workers=None, backtracking_engine="dpll", budget=None, stats=NULL_STATS):
+    start_time = time.time()
+    with stats.phase("search"):
+        model, solvable, components = decomposed_SAT(cnfs, solution, workers, backtracking_engine, budget)
+    end_time = time.time()
+    stats.set("components", len(components))
+
+    largest = max((len({abs(lit) for clause in component for lit in clause}) for component in components), default=0)
+    print(f"Components: {len(components)} (largest: {largest} variables)")
+
+    total_time = end_time - start_time
+
+    with stats.phase("fill"):
+        grid = fill_result(grid, model) if solvable is not None else fill_partial(grid, model)
+    return grid, solvable, total_time
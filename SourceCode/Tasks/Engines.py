@@ -0,0 +1,42 @@
+import importlib
+from Tasks.Budget import BudgetExceeded
+from Tasks.Budget import unknown_result
+
+# Model-level entry points: CNF in, (model, solvable) out, no grid and no printing,
+# so they can run inside worker processes and their results can be merged.
+# With a budget, solvable may also be None (unknown): the model then only holds the
+# literals proven so far.
+SOLUTIONS = ["pysat", "cdcl", "backtracking", "bruteforce"]
+
+# Engines are imported the first time they are used, so a run that never touches pysat
+# (or NumPy, for the bitmask brute force) does not pay for loading it
+ENGINE_MODULES = {
+    "pysat": "Tasks.PySat",
+    "cdcl": "Tasks.CDCL",
+    "backtracking": "Tasks.Backtracking",
+    "bruteforce": "Tasks.BruteForce",
+}
+
+def load_engine(solution):
+    # The engine's module: its model-level *_SAT function and its grid-level wrapper
+    if solution not in ENGINE_MODULES:
+        raise ValueError(f"Unknown solution: {solution}")
+    return importlib.import_module(ENGINE_MODULES[solution])
+
+def solve_model(solution, cnfs, backtracking_engine="dpll", budget=None):
+    cnfs = list(cnfs)
+    engine = load_engine(solution)
+
+    try:
+        if solution == "pysat":
+            return engine.pysat_SAT(cnfs, budget)
+        elif solution == "cdcl":
+            return engine.cdcl_SAT(cnfs, load_engine("backtracking").new_search_stats(), budget)
+        elif solution == "backtracking":
+            if backtracking_engine == "recursive":
+                return engine.back_tracking_SAT(cnfs, 0, {}, None, budget)
+            return engine.dpll_SAT(cnfs, engine.new_search_stats(), budget)
+        elif solution == "bruteforce":
+            return engine.brute_force_SAT(cnfs, 0, {}, True, budget)
+    except BudgetExceeded:
+        return unknown_result(cnfs)
@@ -0,0 +1,85 @@
+import time
+from Data.DataHandler import fill_result
+from Data.Grid import TRAP
+from Data.Grid import GEM
+from Tasks.CNFs_Generation import make_clauses
+from Tasks.PySat import PySatSession
+
+# A board kept alive in one pysat session while its cells change one at a time, e.g. as a
+# player reveals them. Every cell owns the clauses that describe it: a hint its
+# "exactly k traps" clauses (from make_clauses, over its unknown neighbours) plus the unit
+# saying it is no trap, a decided 'T'/'G' cell its unit clause. Those clauses all carry the
+# cell's activation literal, and solving assumes every active one.
+# Changing a cell only touches its 3x3 neighbourhood: the clauses of the cell and of the
+# hints around it are retired (their activation literal is set false for good, so the
+# solver drops them) and emitted again for the new board. Everything else, and what the
+# solver learned about it, stays, so a move costs the same on a 10x10 or a 100x100 board.
+class IncrementalBoard:
+    def __init__(self, grid, encoding="combinations"):
+        self.grid = grid.copy()
+        self.encoding = encoding
+        self.session = PySatSession([], grid.rows * grid.cols, range(1, grid.rows * grid.cols + 1))
+        self.activations = {}
+
+        for index in range(len(self.grid.cells)):
+            self.encode(index)
+
+    def encode(self, index):
+        # Adds the clauses owned by a cell under a fresh activation literal; returns how many
+        if self.grid.is_hint(index):
+            row, col = divmod(index, self.grid.cols)
+            clauses = [[-(index + 1)]] + [list(clause) for clause in
+                                          make_clauses(self.grid, row, col, self.encoding, self.session.new_var)]
+        elif self.grid.cells[index] == TRAP:
+            clauses = [[index + 1]]
+        elif self.grid.cells[index] == GEM:
+            clauses = [[-(index + 1)]]
+        else:
+            return 0
+
+        activation = self.session.new_var()
+        self.activations[index] = activation
+        for clause in clauses:
+            self.session.solver.add_clause(clause + [-activation])
+
+        return len(clauses)
+
+    def retract(self, index):
+        activation = self.activations.pop(index, None)
+        if activation is not None:
+            self.session.solver.add_clause([-activation])
+
+    def update(self, row, col, value):
+        # Sets a cell to a hint digit, 'T', 'G' or '_' and re-encodes its neighbourhood.
+        # Returns the number of clauses emitted.
+        index = self.grid.index(row, col)
+        self.grid.set(row, col, value)
+
+        emitted = 0
+        for cell in [index] + [neighbour for neighbour in self.grid.neighbours(index) if self.grid.is_hint(neighbour)]:
+            self.retract(cell)
+            emitted += self.encode(cell)
+
+        return emitted
+
+    def reveal(self, row, col, hint):
+        return self.update(row, col, str(hint))
+
+    def assumptions(self):
+        return list(self.activations.values())
+
+    def solve(self):
+        # Warm re-solve of the current board: (solved grid, solvable, time)
+        start_time = time.time()
+        solvable = self.session.solve(self.assumptions())
+        model = self.session.get_model() if solvable else []
+        end_time = time.time()
+
+        grid = fill_result(self.grid, model) if solvable else self.grid
+        return grid, solvable, end_time - start_time
+
+    def is_unique(self):
+        return self.session.is_unique(self.assumptions())
+
+    def delete(self):
+        self.session.delete()
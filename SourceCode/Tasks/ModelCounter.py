@@ -0,0 +1,249 @@
+import math
+import sys
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+from Tasks.Presolve import hint_state
+
+# Counts are polynomials in the number of traps: counts[k] is the number of trap layouts
+# with exactly k traps. Independent components multiply, and a global trap count only
+# needs the coefficient of the right degree, so no layout is ever enumerated.
+
+def poly_multiply(a, b):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+def shifted_sum(a, a_shift, b, b_shift):
+    # x^a_shift * a + x^b_shift * b, as a new polynomial
+    result = [0] * max(len(a) + a_shift, len(b) + b_shift)
+    for i, x in enumerate(a):
+        result[i + a_shift] += x
+    for i, y in enumerate(b):
+        result[i + b_shift] += y
+    return result
+
+def free_counts(number_of_cells):
+    # (1 + x)^n: n cells no hint constrains
+    return [math.comb(number_of_cells, k) for k in range(number_of_cells + 1)]
+
+def hint_constraints(grid):
+    # One "exactly k of these cells are traps" constraint per hint that still has unknown
+    # neighbours: what every encoding of generate_CNF_s writes as clauses, without the
+    # C(8, k) clauses of each hint. Returns None when a hint is already contradicted.
+    constraints = set()
+    for index in range(len(grid.cells)):
+        if grid.is_hint(index):
+            unknowns, remaining = hint_state(grid, index)
+            if remaining < 0 or remaining > len(unknowns):
+                return None
+            if unknowns:
+                constraints.add((tuple(unknowns), remaining))
+
+    return list(constraints)
+
+def propagate(constraints, assigned):
+    # Applies `assigned` ({cell: is_trap}) to the constraints, and keeps applying the cells
+    # forced by constraints that need none or all of their cells. Returns the constraints
+    # left, or None on a contradiction; `assigned` is extended with the forced cells.
+    # Each pass only applies the cells the previous one fixed: the constraints it left
+    # hold none of the older ones.
+    new = assigned
+    while True:
+        remaining_constraints = set()
+        forced = {}
+        for cells, traps in constraints:
+            if not new.keys().isdisjoint(cells):
+                traps -= sum(1 for cell in cells if new.get(cell))
+                cells = tuple(cell for cell in cells if cell not in new)
+
+            if traps < 0 or traps > len(cells):
+                return None
+            if traps == 0 or traps == len(cells):
+                for cell in cells:
+                    if forced.setdefault(cell, traps > 0) != (traps > 0):
+                        return None
+            else:
+                remaining_constraints.add((cells, traps))
+
+        if not forced:
+            return list(remaining_constraints)
+        assigned.update(forced)
+        new = forced
+        constraints = remaining_constraints
+
+def split_constraints(constraints):
+    # Groups of constraints linked by shared cells, found with a union-find over cells
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        root = find(cells[0])
+        for cell in cells[1:]:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    components = {}
+    for constraint in constraints:
+        components.setdefault(find(constraint[0][0]), []).append(constraint)
+    return list(components.values())
+
+# Exact model counting with component decomposition and a component cache (the scheme of
+# Cachet and sharpSAT, without clause learning), over the hints' cardinality constraints.
+# A component is counted by branching on one of its cells, propagating, and counting the
+# components left over; components are cached on their constraints, so identical islands
+# left behind by different branches are counted once.
+# For every cell it also counts the layouts where that cell is a trap, which is what the
+# trap probabilities need. Those per-cell counts are shared between cells and with the
+# cache, never changed in place, and a cell that is never a trap has no entry.
+class ModelCounter:
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.cache = {}
+        self.decisions = 0
+        self.cache_hits = 0
+
+    def count(self, constraints, cells):
+        # (counts, trap_counts) over `cells`, which must contain every cell of the
+        # constraints; trap_counts[cell] counts the layouts where cell is a trap
+        # The recursion goes at most one level per decision, i.e. per cell
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 4 * len(cells) + 1000))
+        try:
+            counts, trap_counts, shift = self.count_assigned(constraints, cells, {})
+            # The traps forced before any decision
+            return (shifted_sum(counts, shift, [], 0),
+                    {cell: shifted_sum(cell_counts, shift, [], 0) for cell, cell_counts in trap_counts.items()})
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def count_constraints(self, constraints, cells):
+        constrained = {cell for constraint_cells, _ in constraints for cell in constraint_cells}
+        free = [cell for cell in cells if cell not in constrained]
+
+        # The cells no constraint reaches count as one more independent part
+        # (all of its cells share one trap count, multiplied only once below)
+        free_trap_counts = [0] + free_counts(len(free) - 1)
+        parts = [(free_counts(len(free)), {cell: free_trap_counts for cell in free})]
+        for component in split_constraints(constraints):
+            parts.append(self.count_component(component))
+            if not any(parts[-1][0]):
+                return [0], {}
+
+        # Layouts of independent parts combine as products: a cell's trap count is its own
+        # part's trap count times the counts of all the other parts (prefix * suffix)
+        suffixes = [[1]]
+        for part_counts, _ in reversed(parts):
+            suffixes.append(poly_multiply(part_counts, suffixes[-1]))
+        suffixes.reverse()
+
+        trap_counts = {}
+        prefix = [1]
+        for number, (part_counts, part_trap_counts) in enumerate(parts):
+            others = poly_multiply(prefix, suffixes[number + 1])
+            products = {}
+            for cell, cell_counts in part_trap_counts.items():
+                if id(cell_counts) not in products:
+                    products[id(cell_counts)] = poly_multiply(cell_counts, others)
+                trap_counts[cell] = products[id(cell_counts)]
+            prefix = poly_multiply(prefix, part_counts)
+
+        return prefix, trap_counts
+
+    def count_component(self, component):
+        key = frozenset(component)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        if self.budget is not None:
+            self.budget.check()
+        self.decisions += 1
+
+        cells = list({cell for constraint_cells, _ in component for cell in constraint_cells})
+        branch_cell = self.branch_cell(component)
+
+        # Both branches come back unshifted: their traps are added here, in the one pass
+        # that builds the component's own polynomials
+        counts, trap_counts, shift = self.count_assigned(component, cells, {branch_cell: True})
+        other_counts, other_trap_counts, other_shift = self.count_assigned(component, cells, {branch_cell: False})
+        counts = shifted_sum(counts, shift, other_counts, other_shift)
+        trap_counts = {cell: shifted_sum(trap_counts.get(cell, []), shift, other_trap_counts.get(cell, []), other_shift)
+                       for cell in trap_counts.keys() | other_trap_counts.keys()}
+
+        self.cache[key] = (counts, trap_counts)
+        return counts, trap_counts
+
+    def count_assigned(self, constraints, cells, assigned):
+        # Counts over `cells` with the cells of `assigned` (and those it forces) fixed.
+        # Returns (counts, trap_counts, shift): every layout has `shift` traps from `assigned`
+        # on top of those counted, which the caller adds.
+        constraints = propagate(constraints, assigned)
+        if constraints is None:
+            return [0], {}, 0
+
+        rest = [cell for cell in cells if cell not in assigned]
+        counts, trap_counts = self.count_constraints(constraints, rest)
+
+        shift = 0
+        for cell, value in assigned.items():
+            if value:
+                shift += 1
+                trap_counts[cell] = counts
+
+        return counts, trap_counts, shift
+
+    def branch_cell(self, component):
+        # The cell in the most, and the tightest, constraints: each constraint adds
+        # 1 / its number of cells, so deciding the cell propagates as far as possible
+        scores = {}
+        for cells, _ in component:
+            for cell in cells:
+                scores[cell] = scores.get(cell, 0) + 1 / len(cells)
+        return max(scores, key=scores.get)
+
+# P(trap) of every blank cell of the grid, over all its solutions. Without `traps`, every
+# solution is equally likely; with it, only the solutions with exactly that many traps in
+# total count, cells no hint reaches included.
+# Returns (probabilities, number_of_solutions, counter), probabilities mapping each blank
+# cell's index to P(trap), or (None, 0, counter) when there is no solution.
+def trap_probabilities(grid, traps=None, budget=None):
+    counter = ModelCounter(budget)
+
+    constraints = hint_constraints(grid)
+    if constraints is None:
+        return None, 0, counter
+
+    blanks = [index for index in range(len(grid.cells)) if grid.cells[index] == UNKNOWN]
+    counts, trap_counts = counter.count(constraints, blanks)
+
+    if traps is None:
+        weights = [1] * len(counts)
+    else:
+        # Traps already written in the grid (e.g. by presolve) are part of the total
+        needed = traps - grid.count(chr(TRAP))
+        weights = [1 if k == needed else 0 for k in range(len(counts))]
+
+    total = sum(count * weight for count, weight in zip(counts, weights))
+    if total == 0:
+        return None, 0, counter
+
+    probabilities = {}
+    for cell in blanks:
+        cell_counts = trap_counts.get(cell, [])
+        probabilities[cell] = sum(count * weight for count, weight in zip(cell_counts, weights)) / total
+
+    return probabilities, total, counter
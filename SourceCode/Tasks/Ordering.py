@@ -0,0 +1,110 @@
+import collections
+
+ORDERINGS = ["natural", "bfs", "cuthill-mckee"]
+
+# Clause and variable orders for the solvers that walk the CNF clause by clause
+# (back_tracking_SAT, brute_force_SAT): generate_CNF_s emits the clauses row-major by hint,
+# so a clause is often checked far from the decisions that break it. A reordering ranks the
+# variables by a traversal of their interaction graph (two variables are adjacent if a
+# clause holds both), then
+#   - sorts every clause's literals by rank, so decisions follow the traversal,
+#   - sorts the clauses by the rank of their last variable, shortest clause first among
+#     those ending at the same variable: a clause comes right after the decision on its
+#     last variable, so a conflict shows up next to the decision that caused it.
+# "bfs" is a breadth-first traversal from the lowest variable of every component;
+# "cuthill-mckee" starts from a pseudo-peripheral variable and visits neighbours by
+# increasing degree. Neither beats the row-major natural order on bandwidth (a hint's
+# clauses join cells two rows apart either way); what they cut is the check delay below.
+def interaction_graph(cnfs):
+    neighbours = collections.defaultdict(set)
+    for clause in cnfs:
+        variables = {abs(lit) for lit in clause}
+        for var in variables:
+            neighbours[var].update(variables)
+            neighbours[var].discard(var)
+    return neighbours
+
+def breadth_first(neighbours, start, visited, key):
+    # The component of `start` in BFS order, neighbours taken in `key` order
+    order = [start]
+    visited.add(start)
+    head = 0
+    while head < len(order):
+        for var in sorted(neighbours[order[head]] - visited, key=key):
+            visited.add(var)
+            order.append(var)
+        head += 1
+    return order
+
+def levels(neighbours, start):
+    # BFS levels from `start`: the last level and how many there are
+    level = [start]
+    seen = {start}
+    depth = 0
+    while True:
+        following = {var for current in level for var in neighbours[current]} - seen
+        if not following:
+            return level, depth
+        seen |= following
+        level = list(following)
+        depth += 1
+
+def peripheral_variable(neighbours, start, degree):
+    # George-Liu: jump to a lowest-degree variable of the last BFS level while that makes
+    # the component look deeper
+    last, depth = levels(neighbours, start)
+    while True:
+        candidate = min(last, key=lambda var: (degree[var], var))
+        candidate_last, candidate_depth = levels(neighbours, candidate)
+        if candidate_depth <= depth:
+            return start
+        start, last, depth = candidate, candidate_last, candidate_depth
+
+def variable_order(cnfs, ordering="natural"):
+    # Returns {variable: rank}
+    variables = sorted({abs(lit) for clause in cnfs for lit in clause})
+    if ordering == "natural":
+        return {var: rank for rank, var in enumerate(variables)}
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering: {ordering}")
+
+    neighbours = interaction_graph(cnfs)
+    degree = {var: len(neighbours[var]) for var in variables}
+    if ordering == "bfs":
+        key = None
+    else:
+        key = lambda var: (degree[var], var)
+
+    order = []
+    visited = set()
+    for var in variables:
+        if var not in visited:
+            start = var if ordering == "bfs" else peripheral_variable(neighbours, var, degree)
+            order += breadth_first(neighbours, start, visited, key)
+
+    return {var: rank for rank, var in enumerate(order)}
+
+def reorder_CNF_s(cnfs, ordering="natural"):
+    rank = variable_order(cnfs, ordering)
+    if ordering == "natural":
+        return list(cnfs)
+
+    clauses = [tuple(sorted(clause, key=lambda lit: rank[abs(lit)])) for clause in cnfs]
+
+    # The empty clause (contradicting hints) stays first
+    return sorted(clauses, key=lambda clause: (rank[abs(clause[-1])], len(clause), rank[abs(clause[0])]) if clause else (-1, 0, -1))
+
+def check_delay(cnfs):
+    # How late a clause-by-clause search checks the clauses, in the order given: it decides
+    # a clause's new variables when it reaches the clause, so a clause with none is checked
+    # after every decision made since its last variable. Returns the sum of those gaps.
+    decided = {}
+    total = 0
+    for clause in cnfs:
+        new = {abs(lit) for lit in clause} - decided.keys()
+        if new:
+            for var in new:
+                decided[var] = len(decided)
+        elif clause:
+            total += len(decided) - 1 - max(decided[abs(lit)] for lit in clause)
+    return total
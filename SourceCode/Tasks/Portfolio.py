@@ -0,0 +1,109 @@
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Data.Display import display_portfolio
+from Tasks.Engines import solve_model
+from Tasks.Stats import NULL_STATS
+
+# Seconds a cancelled engine gets to exit after SIGTERM before it is killed
+CANCEL_GRACE = 1.0
+
+def run_engine(connection, solution, cnfs, backtracking_engine, budget):
+    # Worker process: solves the CNF with one engine and sends back a single message
+    start_time = time.perf_counter()
+    try:
+        model, solvable = solve_model(solution, cnfs, backtracking_engine, budget)
+        connection.send((model, solvable, None, time.perf_counter() - start_time))
+    except Exception as error:
+        connection.send(([], None, f"{type(error).__name__}: {error}", time.perf_counter() - start_time))
+    finally:
+        connection.close()
+
+# Races every engine of `solutions` on the same CNF, one process each. The first engine to
+# answer SAT or UNSAT wins and the others are terminated; an engine that fails or runs out
+# of budget does not stop the race. Returns (model, solvable, winner, report) where report
+# holds per engine its status, the time it ran and, for cancelled engines, the time it took
+# to exit. Without a winner the result is unknown: every literal some engine proved.
+def portfolio_SAT(cnfs, solutions, backtracking_engine="dpll", budget=None):
+    cnfs = list(cnfs)
+    engines = {}
+    report = {}
+
+    start_time = time.perf_counter()
+    for solution in dict.fromkeys(solutions):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=run_engine, args=(sender, solution, cnfs, backtracking_engine, budget),
+                                          daemon=True)
+        process.start()
+        sender.close()
+        engines[receiver] = (solution, process)
+
+    model, solvable, winner = [], None, None
+    proven = set()
+    pending = list(engines)
+    try:
+        while pending and winner is None:
+            ready = wait(pending, budget.remaining() if budget is not None else None)
+            if not ready and budget.expired():
+                break
+
+            for receiver in ready:
+                pending.remove(receiver)
+                solution, process = engines[receiver]
+
+                try:
+                    result, result_solvable, error, elapsed = receiver.recv()
+                except EOFError:
+                    result, result_solvable, error, elapsed = [], None, "exited without an answer", None
+
+                if error is not None:
+                    report[solution] = {"status": "failed", "error": error, "time": elapsed}
+                    continue
+
+                if result_solvable is None:
+                    report[solution] = {"status": "unknown", "time": elapsed}
+                    proven.update(result)
+                    continue
+
+                report[solution] = {"status": "finished", "solvable": result_solvable, "time": elapsed}
+                if winner is None:
+                    model, solvable, winner = result, result_solvable, solution
+                    report[solution]["status"] = "won"
+    finally:
+        cancel_time = time.perf_counter()
+        for receiver in pending:
+            engines[receiver][1].terminate()
+
+        for receiver in pending:
+            solution, process = engines[receiver]
+            process.join(CANCEL_GRACE)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            report[solution] = {"status": "cancelled", "time": cancel_time - start_time,
+                                "time_to_cancel": time.perf_counter() - cancel_time}
+
+        for receiver, (solution, process) in engines.items():
+            process.join()
+            receiver.close()
+
+    if winner is None:
+        model = sorted(proven, key=abs)
+
+    return model, solvable, winner, report
+
+def portfolioSat(grid, cnfs, solutions, backtracking_engine="dpll", budget=None, stats=NULL_STATS):
+    start_time = time.time()
+    with stats.phase("search"):
+        model, solvable, winner, report = portfolio_SAT(cnfs, solutions, backtracking_engine, budget)
+    end_time = time.time()
+
+    display_portfolio(winner, report)
+
+    total_time = end_time - start_time
+
+    with stats.phase("fill"):
+        grid = fill_result(grid, model) if solvable is not None else fill_partial(grid, model)
+    return grid, solvable, total_time
@@ -0,0 +1,96 @@
+import collections
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+from Data.Grid import GEM
+
+def nearby_hints(grid, index, radius=2):
+    # Hints within `radius` rows and columns of a cell, the ones that can share an unknown with it
+    row, col = divmod(index, grid.cols)
+    return [i * grid.cols + j
+            for i in range(max(0, row - radius), min(grid.rows, row + radius + 1))
+            for j in range(max(0, col - radius), min(grid.cols, col + radius + 1))
+            if (i != row or j != col) and grid.is_hint(i * grid.cols + j)]
+
+def hint_state(grid, index):
+    # Unknown neighbours of a hint and how many of them still have to be traps
+    unknowns = []
+    remaining = grid.hint(index)
+
+    for neighbour in grid.neighbours(index):
+        if grid.cells[neighbour] == UNKNOWN:
+            unknowns.append(neighbour)
+        elif grid.cells[neighbour] == TRAP:
+            remaining -= 1
+
+    return unknowns, remaining
+
+# Decides cells with the usual Minesweeper rules before any SAT call:
+#   - a hint whose remaining trap count is 0 makes all its unknown neighbours gems,
+#   - a hint whose remaining trap count equals its unknown neighbours makes them all traps,
+#   - if the unknowns of hint A are a subset of those of hint B, the cells only B sees
+#     hold exactly remaining(B) - remaining(A) traps, which may again be 0 or all of them.
+# Hints are re-examined through a work queue only when a cell around them was decided.
+#
+# Returns the residual grid, where decided cells are written as 'T' or 'G' (the CNF and
+# fill_result keep them as they are), and a dict {variable: is_trap} of the decided cells.
+# The residual grid is None if the hints contradict each other.
+def presolve_grid(grid):
+    residual = grid.copy()
+    fixed = {}
+
+    queue = collections.deque(index for index in range(grid.rows * grid.cols) if grid.is_hint(index))
+    queued = set(queue)
+
+    def fix(cells, trap):
+        for index in cells:
+            if residual.cells[index] != UNKNOWN:
+                continue
+            residual.cells[index] = TRAP if trap else GEM
+            fixed[index + 1] = trap
+
+            for hint in residual.neighbours(index):
+                if residual.is_hint(hint) and hint not in queued:
+                    queue.append(hint)
+                    queued.add(hint)
+
+    while queue:
+        index = queue.popleft()
+        queued.discard(index)
+
+        unknowns, remaining = hint_state(residual, index)
+        if remaining < 0 or remaining > len(unknowns):
+            return None, fixed
+        if not unknowns:
+            continue
+
+        if remaining == 0:
+            fix(unknowns, False)
+            continue
+        if remaining == len(unknowns):
+            fix(unknowns, True)
+            continue
+
+        # Subset rule against every hint that can share a cell with this one
+        own = set(unknowns)
+        for other_hint in nearby_hints(residual, index):
+            other_unknowns, other_remaining = hint_state(residual, other_hint)
+            other = set(other_unknowns)
+
+            for small, small_remaining, large, large_remaining in ((own, remaining, other, other_remaining),
+                                                                   (other, other_remaining, own, remaining)):
+                if not small or not small < large:
+                    continue
+
+                extra = large - small
+                extra_traps = large_remaining - small_remaining
+                if extra_traps < 0 or extra_traps > len(extra):
+                    return None, fixed
+                if extra_traps == 0:
+                    fix(extra, False)
+                elif extra_traps == len(extra):
+                    fix(extra, True)
+
+            unknowns, remaining = hint_state(residual, index)
+            own = set(unknowns)
+
+    return residual, fixed
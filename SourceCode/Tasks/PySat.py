@@ -1,24 +1,199 @@
+import threading
 import time
 from pysat.solvers import Solver
+from Data.Grid import UNKNOWN
 from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Tasks.Budget import unknown_result
+from Tasks.Stats import NULL_STATS
 
-def pySat(grid, cnf_s):
+# Seconds between two budget checks of the thread watching a limited solve
+WATCHDOG_INTERVAL = 0.01
+
+def limited_solve(s, cnf_s, budget, assumptions=()):
+    # Plain solve without a budget. Otherwise solve_limited, interrupted by a watchdog thread
+    # once the budget runs out; the result is then unknown (pysat does not expose its level-0
+    # trail, so the proven literals come from unit propagation over the CNF).
+    if budget is None:
+        solvable = s.solve(assumptions=list(assumptions))
+        return (s.get_model() if solvable else []), solvable
+
+    done = threading.Event()
+
+    def watchdog():
+        while not done.wait(WATCHDOG_INTERVAL):
+            if budget.expired():
+                s.interrupt()
+                return
+
+    thread = threading.Thread(target=watchdog, daemon=True)
+    thread.start()
+    try:
+        solvable = s.solve_limited(assumptions=list(assumptions), expect_interrupt=True)
+    finally:
+        done.set()
+        thread.join()
+
+    if solvable is not None:
+        return (s.get_model() if solvable else []), solvable
+
+    s.clear_interrupt()
+    return unknown_result(cnf_s)
+
+def pySat(grid, cnf_s, budget=None, stats=NULL_STATS):
     s = Solver()
 
-    for clause in cnf_s:
-        s.add_clause(clause)
+    with stats.phase("load"):
+        for clause in cnf_s:
+            s.add_clause(clause)
 
     start_time = time.time()
-    solvable = s.solve()
+    with stats.phase("search"):
+        model, solvable = limited_solve(s, cnf_s, budget)
     end_time = time.time()
 
-    if solvable == True:
-        model = s.get_model()          
-        
-        grid = fill_result(grid, model)        
+    if stats.enabled:
+        accumulated = s.accum_stats()
+        stats.update({key: accumulated.get(key, 0) for key in ("decisions", "propagations", "conflicts", "restarts")})
+
+    with stats.phase("fill"):
+        if solvable == True:
+            grid = fill_result(grid, model)        
+        elif solvable is None:
+            grid = fill_partial(grid, model)
 
     s.delete()
 
     run_time = end_time - start_time
 
-    return grid, solvable, run_time
\ No newline at end of file
+    return grid, solvable, run_time
+
+def pysat_SAT(cnf_s, budget=None):
+    s = Solver()
+
+    for clause in cnf_s:
+        s.add_clause(clause)
+
+    model, solvable = limited_solve(s, cnf_s, budget)
+
+    s.delete()
+
+    return model, solvable
+
+# A pysat solver kept alive across calls, so clauses learned by one call speed up the next.
+# Blocking clauses only mention grid variables (auxiliary encoding variables are not part of a
+# solution) and are guarded by an activation literal, which is retired after the query so the
+# session can answer further questions about the original CNF.
+# The grid variables are the blank cells of the puzzle when given, since a blank no hint
+# touches is in no clause but still tells two solutions apart; otherwise the cell variables
+# of cnf_s.
+class PySatSession:
+    def __init__(self, cnf_s, number_of_cells, grid_variables=None):
+        self.solver = Solver()
+        self.next_var = number_of_cells + 1
+        self.calls = []
+
+        for clause in cnf_s:
+            self.add_clause(clause)
+
+        if grid_variables is None:
+            grid_variables = {abs(lit) for clause in cnf_s for lit in clause if abs(lit) <= number_of_cells}
+        self.grid_variables = set(grid_variables)
+
+    def add_clause(self, clause):
+        for lit in clause:
+            self.next_var = max(self.next_var, abs(lit) + 1)
+        self.solver.add_clause(clause)
+
+    def new_var(self):
+        var = self.next_var
+        self.next_var += 1
+        return var
+
+    def solve(self, assumptions=()):
+        before = self.solver.accum_stats()
+
+        start_time = time.perf_counter()
+        solvable = self.solver.solve(assumptions=list(assumptions))
+        elapsed = time.perf_counter() - start_time
+
+        after = self.solver.accum_stats()
+        call = {key: after.get(key, 0) - before.get(key, 0) for key in ("conflicts", "decisions", "propagations")}
+        call["time"] = elapsed
+        call["result"] = solvable
+        self.calls.append(call)
+
+        return solvable
+
+    def get_model(self):
+        return self.solver.get_model()
+
+    def blocking_clause(self, model, activation=None):
+        # A grid variable the solver never saw is missing from the model and counts as false
+        values = {abs(lit): lit for lit in model}
+        clause = [-values.get(var, -var) for var in sorted(self.grid_variables)]
+        return clause if activation is None else clause + [-activation]
+
+    def enumerate(self, limit, assumptions=()):
+        # Yields up to `limit` models that differ on at least one grid variable
+        activation = self.new_var()
+        try:
+            found = 0
+            while found < limit and self.solve([activation, *assumptions]):
+                model = self.get_model()
+                yield model
+                found += 1
+                self.solver.add_clause(self.blocking_clause(model, activation))
+        finally:
+            self.solver.add_clause([-activation])
+
+    def is_unique(self, assumptions=()):
+        # None if there is no solution, otherwise whether a second, different one exists
+        models = list(self.enumerate(2, assumptions))
+        if not models:
+            return None
+        return len(models) == 1
+
+    def delete(self):
+        self.solver.delete()
+
+def blank_variables(grid):
+    return {index + 1 for index, cell in enumerate(grid.cells) if cell == UNKNOWN}
+
+def cold_second_solve(cnf_s, model, number_of_cells, grid_variables):
+    # The second uniqueness query answered by a fresh solver, to measure what the warm session saves
+    session = PySatSession(cnf_s, number_of_cells, grid_variables)
+    session.add_clause(session.blocking_clause(model))
+    session.solve()
+    session.delete()
+
+    return session.calls[-1]
+
+def pysat_uniqueness(grid, cnf_s):
+    # Returns (unique, calls, cold): unique is None when there is no solution, calls are the
+    # per-call stats of the warm session and cold the stats of the same second call from scratch
+    number_of_cells = grid.rows * grid.cols
+    grid_variables = blank_variables(grid)
+
+    session = PySatSession(cnf_s, number_of_cells, grid_variables)
+    models = list(session.enumerate(2))
+    calls = session.calls
+    session.delete()
+
+    if not models:
+        return None, calls, None
+
+    return len(models) == 1, calls, cold_second_solve(cnf_s, models[0], number_of_cells, grid_variables)
+
+def pysat_enumerate(grid, cnf_s, limit, calls=None):
+    # Streams up to `limit` distinct solved grids; per-call stats are appended to `calls`
+    number_of_cells = grid.rows * grid.cols
+
+    session = PySatSession(cnf_s, number_of_cells, blank_variables(grid))
+    if calls is not None:
+        session.calls = calls
+    try:
+        for model in session.enumerate(limit):
+            yield fill_result(grid, model)
+    finally:
+        session.delete()
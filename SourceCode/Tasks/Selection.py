@@ -0,0 +1,68 @@
+import json
+import os
+from Tasks.Decomposition import split_CNF_s
+from Tasks.Presolve import hint_state
+
+# Thresholds written by `python Benchmark.py calibrate`, next to main.py
+DEFAULT_SELECTION_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "autoselect.json")
+
+FEATURES = ["unknowns", "clauses", "components", "largest_component", "max_hint_degree"]
+
+# Used when the selection file is missing: small islands are searched in-process by the
+# DPLL backtracking (which does not load pysat), everything else goes to pysat
+DEFAULT_RULES = [
+    {"when": {"max_largest_component": 200}, "solution": "backtracking", "encoding": "combinations"},
+    {"when": {}, "solution": "pysat", "encoding": "combinations"},
+]
+
+# Picks a solver and an encoding for a grid from a few features that cost far less than a
+# solve: the unknowns, the CNF's clauses, its independent components (as many unknowns as
+# the largest one holds, auxiliary variables of the encoding left out, so the feature
+# does not depend on it) and the most unknowns a single hint sees.
+# Rules are tried in order, the first one whose bounds all hold ("max_<feature>" and
+# "min_<feature>", both inclusive) decides; a rule without bounds matches every grid.
+def extract_features(grid, cnfs):
+    cells = grid.rows * grid.cols
+    sizes = [len({abs(lit) for clause in component for lit in clause if abs(lit) <= cells})
+             for component in split_CNF_s(cnfs)]
+
+    degrees = [len(hint_state(grid, index)[0]) for index in range(cells) if grid.is_hint(index)]
+
+    return {
+        "unknowns": grid.count('_'),
+        "clauses": len(cnfs),
+        "components": len(sizes),
+        "largest_component": max(sizes, default=0),
+        "max_hint_degree": max(degrees, default=0),
+    }
+
+def load_rules(path=None):
+    # The selection file's rules, or DEFAULT_RULES when there is no file
+    path = path or DEFAULT_SELECTION_FILE
+    if not os.path.exists(path):
+        return DEFAULT_RULES
+
+    with open(path) as f:
+        rules = json.load(f)["rules"]
+
+    for rule in rules:
+        for bound in rule.get("when", {}):
+            if bound[:4] not in ("max_", "min_") or bound[4:] not in FEATURES:
+                raise ValueError(f"{path}: unknown bound {bound}")
+    return rules
+
+def rule_matches(rule, features):
+    for bound, value in rule.get("when", {}).items():
+        feature = features[bound[4:]]
+        if bound.startswith("max_") and feature > value:
+            return False
+        if bound.startswith("min_") and feature < value:
+            return False
+    return True
+
+def select_engine(features, rules=DEFAULT_RULES):
+    # Returns (solution, encoding, index of the rule that matched, None for the fallback)
+    for position, rule in enumerate(rules):
+        if rule_matches(rule, features):
+            return rule["solution"], rule.get("encoding", "combinations"), position
+    return "pysat", "combinations", None
@@ -0,0 +1,108 @@
+import contextlib
+import time
+
+# Instrumentation threaded through execution and the solvers. A Stats object records
+#   - phases: nanoseconds spent in each named phase (perf_counter_ns), summed over calls,
+#   - counters: clause and variable counts, decisions, propagations, conflicts, ...
+# and, when given a cProfile profiler, profiles the code run inside its outermost phases.
+# Names are scoped with scope("pysat") -> "pysat.search", so every run keeps its own.
+# NULL_STATS has the same methods doing nothing and is the default everywhere, so disabled
+# instrumentation costs one no-op call per phase, never anything per clause or decision.
+class Stats:
+    enabled = True
+
+    def __init__(self, profiler=None, prefix="", phases=None, counters=None):
+        self.profiler = profiler
+        self.prefix = prefix
+        self.phases = {} if phases is None else phases
+        self.counters = {} if counters is None else counters
+        self.depth = [0]
+
+    def scope(self, name):
+        # A view writing into the same tables under "<name>."
+        scoped = Stats(self.profiler, f"{self.prefix}{name}.", self.phases, self.counters)
+        scoped.depth = self.depth
+        return scoped
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        outermost = self.depth[0] == 0
+        self.depth[0] += 1
+        if outermost and self.profiler is not None:
+            self.profiler.enable()
+
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if outermost and self.profiler is not None:
+                self.profiler.disable()
+            self.depth[0] -= 1
+
+            key = self.prefix + name
+            self.phases[key] = self.phases.get(key, 0) + elapsed
+
+    def add(self, name, value=1):
+        key = self.prefix + name
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value):
+        self.counters[self.prefix + name] = value
+
+    def update(self, counters):
+        # Merges a solver's own counter dict (e.g. new_search_stats())
+        for name, value in counters.items():
+            self.add(name, value)
+
+    def own_counters(self):
+        # This scope's counters without the "<name>." prefix
+        return {key[len(self.prefix):]: value for key, value in self.counters.items() if key.startswith(self.prefix)}
+
+    def to_dict(self):
+        return {
+            "phases_ns": dict(self.phases),
+            "counters": dict(self.counters),
+            "peak_rss": peak_memory(),
+        }
+
+class NullStats:
+    enabled = False
+
+    def scope(self, name):
+        return self
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def add(self, name, value=1):
+        pass
+
+    def set(self, name, value):
+        pass
+
+    def update(self, counters):
+        pass
+
+NULL_PHASE = contextlib.nullcontext()
+NULL_STATS = NullStats()
+
+def make_stats(enabled=False, profile=False):
+    # NULL_STATS unless stats or a profile were asked for
+    if not enabled and not profile:
+        return NULL_STATS
+
+    import cProfile
+    return Stats(cProfile.Profile() if profile else None)
+
+def peak_memory():
+    # Peak resident set size in bytes of this process and of its finished children
+    # (decomposition, portfolio and bitmask workers), None where resource is missing
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * 1024
@@ -0,0 +1,261 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from Data.DataHandler import fill_result
+from Data.Grid import Grid
+from Data.Grid import UNKNOWN
+from Data.Grid import TRAP
+from Data.Grid import GEM
+from Tasks.CNFs_Generation import generate_CNF_s
+from Tasks.Decomposition import stop_workers
+from Tasks.Stats import NULL_STATS
+
+# Seconds between budget checks while waiting for the workers
+BUDGET_POLL = 0.1
+
+DEFAULT_TILE_SIZE = 64
+
+# Cells a window reaches past its tile on every side. With 2, every hint that sees a cell of
+# the tile is inside the window with all of its neighbours, so its clauses are in the window's CNF
+DEFAULT_OVERLAP = 2
+
+# Solving a board that is too large for one CNF, a tile at a time. The grid is cut into
+# tiles (rectangles of rows and columns, each owned by one solve), and every tile is solved
+# through a window: the tile plus `overlap` cells around it. A window's CNF only has the hints
+# whose whole neighbourhood lies inside the window, so it is a relaxation of the full CNF:
+# an unsatisfiable window proves the grid unsatisfiable, and memory stays bounded by the
+# window size. All windows are first solved independently, in parallel, and each tile keeps
+# its window's values.
+# Two tiles may then disagree around a hint that sees cells of both. The hint's 3x3 block is
+# then solved again, as a small region with its own window, every cell of the window outside
+# the region assumed to hold its current value (the neighbouring tiles' boundary values).
+# With an overlap of 2 every hint touching the region is in that window, so a satisfiable
+# re-solve settles all of them without breaking another one. An unsatisfiable one names
+# (pysat's get_core) the boundary cells it cannot live with, and the region grows just
+# enough to hold them and is solved again. Regions only grow, so in the worst case the last
+# one is the whole grid, solved without assumptions.
+def tile_regions(grid, tile_size):
+    # Tiles as (first row, last row + 1, first col, last col + 1)
+    return [(r0, min(r0 + tile_size, grid.rows), c0, min(c0 + tile_size, grid.cols))
+            for r0 in range(0, grid.rows, tile_size)
+            for c0 in range(0, grid.cols, tile_size)]
+
+def expand(grid, region, margin):
+    r0, r1, c0, c1 = region
+    return max(0, r0 - margin), min(grid.rows, r1 + margin), max(0, c0 - margin), min(grid.cols, c1 + margin)
+
+def contains(region, row, col):
+    r0, r1, c0, c1 = region
+    return r0 <= row < r1 and c0 <= col < c1
+
+def window_grid(grid, window):
+    # The window's cells as a grid of their own. Hints on a window edge that is not a border
+    # of the grid see cells outside the window; they are written as gems (a hint cell is
+    # never a trap), so they add no clause
+    r0, r1, c0, c1 = window
+    cells = bytearray().join(grid.cells[i * grid.cols + c0:i * grid.cols + c1] for i in range(r0, r1))
+    window = Grid(r1 - r0, c1 - c0, cells)
+
+    cut_rows = ([0] if r0 > 0 else []) + ([window.rows - 1] if r1 < grid.rows else [])
+    cut_cols = ([0] if c0 > 0 else []) + ([window.cols - 1] if c1 < grid.cols else [])
+    edges = {window.index(i, j) for i in cut_rows for j in range(window.cols)}
+    edges |= {window.index(i, j) for j in cut_cols for i in range(window.rows)}
+    for index in edges:
+        if window.is_hint(index):
+            window.cells[index] = GEM
+
+    return window
+
+def solve_window(window, encoding="combinations", assumptions=(), budget=None):
+    # Returns (filled window cells, solvable, core, clauses); core holds the assumptions that
+    # made an unsatisfiable window so, the filled cells are None unless it is satisfiable.
+    # pysat is imported here, so importing this module (as execution does) does not load it
+    from pysat.solvers import Solver
+    from Tasks.PySat import limited_solve
+
+    cnfs = generate_CNF_s(window, encoding)
+    if assumptions:
+        # Boundary cells no clause of the window mentions are left out
+        variables = {abs(lit) for clause in cnfs for lit in clause}
+        assumptions = [lit for lit in assumptions if abs(lit) in variables]
+
+    s = Solver()
+    for clause in cnfs:
+        s.add_clause(clause)
+
+    model, solvable = limited_solve(s, cnfs, budget, assumptions)
+    core = (s.get_core() or []) if solvable is False and assumptions else []
+    s.delete()
+
+    cells = bytes(fill_result(window, model).cells) if solvable else None
+    return cells, solvable, core, len(cnfs)
+
+def copy_region(result, cells, window, region):
+    # Writes the region's part of a solved window into the result grid
+    wr0, wr1, wc0, wc1 = window
+    r0, r1, c0, c1 = region
+    width = wc1 - wc0
+    for i in range(r0, r1):
+        start = (i - wr0) * width + c0 - wc0
+        result.cells[i * result.cols + c0:i * result.cols + c1] = cells[start:start + c1 - c0]
+
+def hint_violated(grid, result, index):
+    traps = sum(1 for neighbour in grid.neighbours(index) if result.cells[neighbour] == TRAP)
+    return traps != grid.hint(index)
+
+def seam_hints(grid, tile_size):
+    # Hints next to a tile border: the only ones that see cells of more than one tile
+    rows = {i for i in range(grid.rows) if i % tile_size in (0, tile_size - 1)}
+    cols = {j for j in range(grid.cols) if j % tile_size in (0, tile_size - 1)}
+    indices = {grid.index(i, j) for i in rows for j in range(grid.cols)}
+    indices |= {grid.index(i, j) for j in cols for i in range(grid.rows)}
+    return {index for index in indices if grid.is_hint(index)}
+
+def boundary_assumptions(grid, result, window, region):
+    # The unknown cells of the window outside the region, fixed to their current value
+    r0, r1, c0, c1 = window
+    width = c1 - c0
+    assumptions = []
+    for i in range(r0, r1):
+        for j in range(c0, c1):
+            index = grid.index(i, j)
+            if grid.cells[index] == UNKNOWN and not contains(region, i, j):
+                var = (i - r0) * width + (j - c0) + 1
+                assumptions.append(var if result.cells[index] == TRAP else -var)
+    return assumptions
+
+def grow_region(region, cells):
+    # The smallest rectangle holding the region and the cells
+    r0, r1, c0, c1 = region
+    for row, col in cells:
+        r0, r1, c0, c1 = min(r0, row), max(r1, row + 1), min(c0, col), max(c1, col + 1)
+    return r0, r1, c0, c1
+
+def solve_tiles(grid, regions, overlap, encoding, workers, budget, result, tally):
+    # First pass: every window on its own. Returns False if one is unsatisfiable, None if
+    # the budget ran out, True otherwise
+    windows = [expand(grid, region, overlap) for region in regions]
+
+    def collect(region, window, outcome):
+        cells, solvable, _, clauses = outcome
+        tally["largest_window"] = max(tally["largest_window"], clauses)
+        if solvable:
+            copy_region(result, cells, window, region)
+        return solvable
+
+    if workers == 1 or len(regions) == 1:
+        for region, window in zip(regions, windows):
+            solvable = collect(region, window, solve_window(window_grid(grid, window), encoding, (), budget))
+            if not solvable:
+                return solvable
+        return True
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    finished = False
+    try:
+        pending = {executor.submit(solve_window, window_grid(grid, window), encoding, (), budget): (region, window)
+                   for region, window in zip(regions, windows)}
+
+        while pending:
+            done, _ = wait(pending, timeout=BUDGET_POLL if budget is not None else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                region, window = pending.pop(future)
+                solvable = collect(region, window, future.result())
+                if not solvable:
+                    return solvable
+
+            if pending and budget is not None and budget.expired():
+                return None
+        finished = True
+    finally:
+        # An unsatisfiable window or the budget stops the windows still being solved
+        if finished:
+            executor.shutdown(wait=False)
+        else:
+            stop_workers(executor)
+
+    return True
+
+def reconcile(grid, overlap, encoding, budget, result, conflicts, tally):
+    # Repairs violated seam hints one at a time, starting from the hint's own neighbourhood,
+    # until none is left. Returns the final solvable: True, False (the hints contradict) or
+    # None (budget)
+    while conflicts:
+        if budget is not None and budget.expired():
+            return None
+
+        hint = next(iter(conflicts))
+        row, col = divmod(hint, grid.cols)
+        region = expand(grid, (row, row + 1, col, col + 1), 1)
+
+        while True:
+            window = expand(grid, region, overlap)
+            assumptions = boundary_assumptions(grid, result, window, region)
+            cells, solvable, core, clauses = solve_window(window_grid(grid, window), encoding, assumptions, budget)
+            tally["resolves"] += 1
+            tally["largest_window"] = max(tally["largest_window"], clauses)
+
+            if solvable:
+                break
+            if solvable is None:
+                return None
+            if not core:
+                # Unsatisfiable without any of the neighbours' values
+                return False
+
+            width = window[3] - window[2]
+            culprits = [(window[0] + (abs(lit) - 1) // width, window[2] + (abs(lit) - 1) % width) for lit in core]
+            region = grow_region(region, culprits)
+            tally["grown"] += 1
+
+        copy_region(result, cells, window, region)
+
+        # Only hints around the region can have changed; all of them now hold
+        r0, r1, c0, c1 = expand(grid, region, 1)
+        for i in range(r0, r1):
+            for j in range(c0, c1):
+                index = grid.index(i, j)
+                if index in conflicts and not hint_violated(grid, result, index):
+                    conflicts.discard(index)
+
+    return True
+
+def tiled_SAT(grid, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, encoding="combinations", workers=None,
+              budget=None, stats=NULL_STATS):
+    # Returns (solved grid or None, solvable, tally)
+    if overlap < DEFAULT_OVERLAP:
+        raise ValueError(f"Windows need an overlap of at least {DEFAULT_OVERLAP} cells")
+
+    workers = workers or os.cpu_count() or 1
+    regions = tile_regions(grid, tile_size)
+    result = grid.copy()
+    tally = {"tiles": len(regions), "conflicts": 0, "resolves": 0, "grown": 0, "largest_window": 0}
+
+    with stats.phase("search"):
+        solvable = solve_tiles(grid, regions, overlap, encoding, workers, budget, result, tally)
+    if not solvable:
+        return None, solvable, tally
+
+    with stats.phase("reconcile"):
+        conflicts = {index for index in seam_hints(grid, tile_size) if hint_violated(grid, result, index)}
+        tally["conflicts"] = len(conflicts)
+        solvable = reconcile(grid, overlap, encoding, budget, result, conflicts, tally)
+
+    return (result if solvable else None), solvable, tally
+
+def tiled_solve(grid, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, encoding="combinations", workers=None,
+                budget=None, stats=NULL_STATS):
+    start_time = time.time()
+    solved, solvable, tally = tiled_SAT(grid, tile_size, overlap, encoding, workers, budget, stats)
+    end_time = time.time()
+    stats.update(tally)
+
+    print(f"Tiles: {tally['tiles']} ({tile_size}x{tile_size}, overlap {overlap}), {tally['conflicts']} seam conflicts, "
+          f"{tally['resolves']} re-solves, {tally['grown']} grown regions, largest window: {tally['largest_window']} clauses")
+
+    total_time = end_time - start_time
+
+    # Tiles are not proofs: an unknown result decides no cell
+    return (solved if solvable else grid), solvable, total_time
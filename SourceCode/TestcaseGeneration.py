@@ -1,7 +1,14 @@
+import argparse
+import json
+import os
 import random
 import copy
 import re # Import regular expressions for input parsing
 import math # For ceiling function
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from Tasks.CNFs_Generation import exactly_k
 
 def is_valid(r, c, rows, cols):
     """Check if the coordinates are within the grid boundaries."""
@@ -105,7 +112,6 @@ def generate_solvable_minesweeper_grid(rows, cols, trap_probability, reveal_prob
 
     return puzzle_grid, solution_grid, actual_blanks
 
-
 def generate_grid_with_target_blanks(rows, cols, trap_probability,
                                       target_min_blanks, target_max_blanks,
                                       max_attempts=30):
@@ -167,7 +173,6 @@ def generate_grid_with_target_blanks(rows, cols, trap_probability,
     print(f"\nFailed to generate grid within target blank range after {max_attempts} attempts.")
     return None
 
-
 def write_grid_to_file(grid, filename="output.txt"):
     """Writes the grid to a file in the specified format."""
     if grid is None:
@@ -253,14 +258,240 @@ def get_blank_range_from_user(max_possible_blanks):
             print("\nInput stream closed. Exiting.")
             return None, None
 
-
 # --- Configuration ---
 TRAP_PROBABILITY = 0.18 # Base trap probability (can influence difficulty)
 OUTPUT_FILENAME = "output.txt"
 MAX_GENERATION_ATTEMPTS = 30 # Number of tries to hit the blank target
 
+# --- Fast non-interactive generation ---
+UNIQUENESS_ENCODING = "totalizer" # Cardinality encoding of the hints in the uniqueness check
+PUZZLES_PER_TASK = 8 # Puzzles handed to a worker at a time
+
+def compute_hint_numbers(traps):
+    """
+    Counts the traps around every cell at once.
+
+    Args:
+        traps (numpy.ndarray): Boolean (rows, cols) trap mask.
+
+    Returns:
+        numpy.ndarray: uint8 (rows, cols) array with the number of adjacent traps,
+                       the sum of the eight shifted views of the zero-padded mask.
+    """
+    import numpy as np
+
+    rows, cols = traps.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = traps
+
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dr in range(3):
+        for dc in range(3):
+            if dr != 1 or dc != 1:
+                counts += padded[dr:dr + rows, dc:dc + cols]
+    return counts
+
+def build_uniqueness_session(traps, numbers):
+    """
+    Builds a pysat session that is satisfiable iff some hints admit a second solution.
+
+    Every safe cell gets an activation literal. Assuming it reveals the cell: the cell is
+    safe and its neighbours hold exactly its number of traps. A single permanent clause
+    blocks the true trap layout, so the session is UNSAT under a set of revealed hints
+    exactly when those hints have a unique solution.
+
+    Returns:
+        tuple: (session, selectors) where selectors maps a cell variable to its
+               activation literal.
+    """
+    # pysat (like NumPy) is imported only by the non-interactive generator
+    from Tasks.PySat import PySatSession
+
+    rows, cols = traps.shape
+    session = PySatSession([], rows * cols)
+    selectors = {}
+
+    for r in range(rows):
+        for c in range(cols):
+            if traps[r, c]:
+                continue
+
+            cell = r * cols + c + 1
+            selector = session.new_var()
+            selectors[cell] = selector
+
+            session.add_clause([-selector, -cell])
+            around = [nr * cols + nc + 1
+                      for nr in range(max(0, r - 1), min(rows, r + 2))
+                      for nc in range(max(0, c - 1), min(cols, c + 2))
+                      if nr != r or nc != c]
+            for clause in exactly_k(around, int(numbers[r, c]), UNIQUENESS_ENCODING, session.new_var):
+                session.add_clause(clause + [-selector])
+
+    session.add_clause([-(r * cols + c + 1) if traps[r, c] else r * cols + c + 1
+                        for r in range(rows) for c in range(cols)])
+
+    return session, selectors
+
+def generate_unique_puzzle(rows, cols, trap_probability, seed, max_blanks=None,
+                           max_attempts=MAX_GENERATION_ATTEMPTS):
+    """
+    Generates one puzzle whose hints have exactly one solution.
+
+    Starts from every safe cell revealed and greedily hides hints in random order,
+    keeping a hint hidden only if the remaining ones still force the same layout.
+    One incremental solver answers every check of an attempt.
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        trap_probability (float): Probability of a cell being a trap.
+        seed: Anything numpy.random.default_rng accepts; the same seed gives the same puzzle.
+        max_blanks (int or None): Stop hiding hints once this many cells are blank.
+        max_attempts (int): Trap layouts to try before giving up.
+
+    Returns:
+        tuple: (puzzle_grid, solution_grid) or (None, None) if no attempt produced a
+               uniquely solvable layout (a trap walled in by other traps and borders
+               can never be pinned down).
+    """
+    import numpy as np
+
+    for attempt in range(max_attempts):
+        rng = np.random.default_rng([*np.atleast_1d(seed), attempt])
+        traps = rng.random((rows, cols)) < trap_probability
+        numbers = compute_hint_numbers(traps)
+
+        session, selectors = build_uniqueness_session(traps, numbers)
+        try:
+            revealed = set(selectors)
+            if session.solve(selectors.values()):
+                continue
+
+            blanks = int(traps.sum())
+            for cell in rng.permutation(sorted(selectors)).tolist():
+                if max_blanks is not None and blanks >= max_blanks:
+                    break
+
+                revealed.discard(cell)
+                if session.solve(selectors[other] for other in revealed):
+                    revealed.add(cell)
+                else:
+                    # Still unique without it: retire the hint for good
+                    session.add_clause([-selectors[cell]])
+                    blanks += 1
+        finally:
+            session.delete()
+
+        puzzle_grid = [['_'] * cols for _ in range(rows)]
+        solution_grid = [['T' if traps[r, c] else 'G' for c in range(cols)] for r in range(rows)]
+        for cell in revealed:
+            r, c = divmod(cell - 1, cols)
+            puzzle_grid[r][c] = solution_grid[r][c] = str(numbers[r, c])
+
+        return puzzle_grid, solution_grid
+
+    return None, None
+
+def generate_puzzle_task(task):
+    """Worker entry point: generates the puzzle of one index of a run."""
+    index, rows, cols, trap_probability, seed, max_blanks = task
+    puzzle_grid, solution_grid = generate_unique_puzzle(rows, cols, trap_probability, [seed, index], max_blanks)
+    return index, puzzle_grid, solution_grid
+
+def generate_puzzles(rows, cols, trap_probability, count, seed=0, max_blanks=None, workers=None):
+    """
+    Generates `count` uniquely solvable puzzles across a pool of worker processes.
+
+    Puzzle i is seeded with (seed, i), so the output does not depend on the number of workers.
+
+    Yields:
+        tuple: (index, puzzle_grid, solution_grid) in index order; the grids are None
+               for an index that failed every attempt.
+    """
+    tasks = [(index, rows, cols, trap_probability, seed, max_blanks) for index in range(1, count + 1)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        yield from map(generate_puzzle_task, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(generate_puzzle_task, tasks, chunksize=PUZZLES_PER_TASK)
+
+def grid_to_text(grid):
+    """Formats a grid the way input/output files store it."""
+    return '\n'.join(', '.join(row) for row in grid)
+
+def write_puzzles(puzzles, output):
+    """
+    Writes generated puzzles either as one JSONL file or as input_i.txt/output_i.txt pairs.
+
+    A path ending in .jsonl (or "-" for stdout) gets one {"id", "grid", "solution"} line
+    per puzzle, which `main.py batch` reads directly. Anything else is a directory.
+
+    Returns:
+        tuple: (written, failed) puzzle counts.
+    """
+    written = failed = 0
+
+    if output == "-" or output.endswith(".jsonl"):
+        f = sys.stdout if output == "-" else open(output, "w", buffering=1 << 20)
+        try:
+            for index, puzzle_grid, solution_grid in puzzles:
+                if puzzle_grid is None:
+                    failed += 1
+                    continue
+                f.write(json.dumps({"id": index, "grid": grid_to_text(puzzle_grid),
+                                    "solution": grid_to_text(solution_grid)}) + '\n')
+                written += 1
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        return written, failed
+
+    os.makedirs(output, exist_ok=True)
+    for index, puzzle_grid, solution_grid in puzzles:
+        if puzzle_grid is None:
+            failed += 1
+            continue
+        for name, grid in (("input", puzzle_grid), ("output", solution_grid)):
+            with open(os.path.join(output, f"{name}_{index}.txt"), 'w') as f:
+                f.write(grid_to_text(grid))
+        written += 1
+    return written, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate uniquely solvable test cases without prompting")
+    parser.add_argument('-s', '--size', type=int, required=True, help="Number of rows (and columns unless --cols)")
+    parser.add_argument('--cols', type=int, default=None)
+    parser.add_argument('-p', '--trap-probability', type=float, default=TRAP_PROBABILITY)
+    parser.add_argument('--max-blanks', type=int, default=None,
+                        help="Stop hiding hints at this many blank cells (default: hide as many as possible)")
+    parser.add_argument('-n', '--count', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('-o', '--output', default="generated.jsonl",
+                        help="A .jsonl file, - for stdout, or a directory for input_i.txt/output_i.txt pairs")
+    args = parser.parse_args(argv)
+
+    if args.size <= 0 or (args.cols is not None and args.cols <= 0) or not 0.0 <= args.trap_probability <= 1.0:
+        parser.error("invalid grid size or trap probability")
+
+    puzzles = generate_puzzles(args.size, args.cols or args.size, args.trap_probability, args.count,
+                               args.seed, args.max_blanks, args.workers)
+    written, failed = write_puzzles(puzzles, args.output)
+
+    print(f"Generated {written} puzzle(s) to {args.output}" + (f", {failed} failed" if failed else ""),
+          file=sys.stderr)
+    return 0 if written else 1
+
 # --- Generate and Save ---
 if __name__ == "__main__":
+    # Any argument selects the non-interactive generator
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
     grid_size = get_grid_size_from_user()
 
     if grid_size is not None:
@@ -0,0 +1,193 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from Data.DataHandler import load_grid
+from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
+from Data.Grid import Grid
+from Data.Cache import Cache
+from Data.Cache import DEFAULT_CACHE_SIZE
+from UI.Execution import cache_solver_key
+
+# Puzzles in flight per worker: enough to keep every worker busy without reading
+# a whole stdin stream into memory
+TASKS_PER_WORKER = 4
+
+def init_worker(cache_directory=None, cache_size=DEFAULT_CACHE_SIZE, solutions=()):
+    # Import the solvers of `solutions` (and pysat with them) once per worker process, not
+    # on the first puzzle: Tasks.Engines alone only loads an engine when it is first used
+    global solve_model, iter_CNF_s, make_budget, cache
+    from Tasks.Engines import solve_model
+    from Tasks.Engines import load_engine
+    from Tasks.CNFs_Generation import iter_CNF_s
+    from Tasks.Budget import make_budget
+    for solution in solutions:
+        load_engine(solution)
+
+    # Workers share the cache directory; entries are written atomically so they never clash
+    cache = Cache(cache_directory, cache_size) if cache_directory else None
+
+def solve_puzzle(puzzle_id, grid, solution, encoding, backtracking_engine, timeout=None, max_memory=None, validate=False):
+    try:
+        # solve_model's brute force is the recursive engine
+        solver_key = cache_solver_key(solution, [solution], False, False, backtracking_engine, "recursive")
+        cache_hits = []
+
+        start_time = time.perf_counter()
+        cnfs = cache.get_cnf(grid, encoding) if cache else None
+        if cnfs is not None:
+            cache_hits.append("cnf")
+        else:
+            cnfs = list(iter_CNF_s(grid, encoding))
+            if cache:
+                cache.put_cnf(grid, encoding, cnfs)
+        cnf_time = time.perf_counter() - start_time
+
+        # The budget starts when this puzzle's search starts, not when it was queued
+        budget = make_budget(timeout, max_memory)
+
+        start_time = time.perf_counter()
+        puzzle_key = cache.puzzle_key(grid, encoding) if cache else None
+        cached = cache.get_model(puzzle_key, solver_key) if cache else None
+        if cached is not None:
+            cache_hits.append("model")
+            model, solvable = cached
+        else:
+            model, solvable = solve_model(solution, cnfs, backtracking_engine, budget)
+            if cache:
+                cache.put_model(puzzle_key, solver_key, model, solvable)
+        solve_time = time.perf_counter() - start_time
+    except Exception as error:
+        return {"id": puzzle_id, "error": f"{type(error).__name__}: {error}"}
+
+    if solvable:
+        solved_grid = fill_result(grid, model)
+    elif solvable is None:
+        # Unknown: only the cells proven before the budget ran out are filled in
+        solved_grid = fill_partial(grid, model)
+    else:
+        solved_grid = grid
+
+    result = {
+        "id": puzzle_id,
+        "grid": solved_grid.to_rows(),
+        "solvable": solvable,
+        "time": cnf_time + solve_time,
+        "budget": budget.reason if budget is not None else None,
+        "stats": {
+            "clauses": len(cnfs),
+            "variables": len({abs(lit) for clause in cnfs for lit in clause}),
+            "cnf_time": cnf_time,
+            "solve_time": solve_time,
+            "cache_hits": cache_hits,
+        },
+    }
+    if validate and solvable:
+        # NumPy is only needed when the solutions are validated
+        from Data.Validation import validate_grid
+        result["valid"] = validate_grid(grid, solved_grid)
+
+    return result
+
+def parse_grid(value):
+    # JSONL puzzles carry the grid either as rows of cells or as the text of an input file
+    if isinstance(value, str):
+        return Grid.from_text(value.encode("ascii"))
+    return Grid.from_rows(value)
+
+def read_puzzles(source, pattern="input_*.txt"):
+    # Yields (id, grid, error): a puzzle that cannot be read has no grid and the reason in
+    # error, so one bad line or file does not stop the others
+    if os.path.isdir(source):
+        for filename in sorted(glob.glob(os.path.join(source, pattern))):
+            try:
+                yield filename, load_grid(filename), None
+            except (OSError, ValueError) as error:
+                yield filename, None, f"{type(error).__name__}: {error}"
+        return
+
+    f = sys.stdin if source == "-" else open(source, "r")
+    try:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            puzzle_id = number
+            try:
+                puzzle = json.loads(line)
+                if not isinstance(puzzle, dict) or "grid" not in puzzle:
+                    raise ValueError("a puzzle must be a JSON object with a \"grid\"")
+                puzzle_id = puzzle.get("id", number)
+                grid = parse_grid(puzzle["grid"])
+            except (ValueError, TypeError) as error:
+                yield puzzle_id, None, f"{type(error).__name__}: {error}"
+            else:
+                yield puzzle_id, grid, None
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def batch_execution(source, output, solution="pysat", encoding="combinations", workers=None,
+                    backtracking_engine="dpll", pattern="input_*.txt", timeout=None, max_memory=None,
+                    cache_directory=None, cache_size=DEFAULT_CACHE_SIZE, validate=False):
+    workers = workers or os.cpu_count() or 1
+    out = sys.stdout if output == "-" else open(output, "w")
+
+    solved = unsolvable = unknown = failed = cached = invalid = 0
+    start_time = time.time()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(cache_directory, cache_size, [solution])) as executor:
+            pending = set()
+            puzzles = read_puzzles(source, pattern)
+
+            while True:
+                for puzzle_id, grid, error in puzzles:
+                    if error is not None:
+                        # Reported like a failed solve, in reading order
+                        failed += 1
+                        out.write(json.dumps({"id": puzzle_id, "error": error}) + "\n")
+                        continue
+                    pending.add(executor.submit(solve_puzzle, puzzle_id, grid, solution, encoding, backtracking_engine,
+                                                 timeout, max_memory, validate))
+                    if len(pending) >= workers * TASKS_PER_WORKER:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if "error" in result:
+                        failed += 1
+                    elif result["solvable"] is None:
+                        unknown += 1
+                    elif result["solvable"]:
+                        solved += 1
+                    else:
+                        unsolvable += 1
+                    if "model" in result.get("stats", {}).get("cache_hits", ()):
+                        cached += 1
+                    if result.get("valid") is False:
+                        invalid += 1
+
+                    out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    total = solved + unsolvable + unknown + failed
+    print(f"Batch: {total} puzzles ({solved} solved, {unsolvable} unsolvable, {unknown} unknown, {failed} failed) "
+          f"in {time.time() - start_time:.2f}(s) with {workers} workers", file=sys.stderr)
+    if cache_directory:
+        print(f"Cache ({cache_directory}): {cached} of {total} puzzles answered from the cache", file=sys.stderr)
+    if validate:
+        print(f"Validation: {solved - invalid} of {solved} solutions consistent with their hints", file=sys.stderr)
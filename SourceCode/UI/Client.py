@@ -0,0 +1,81 @@
+import http.client
+import json
+import socket
+from Data.DataHandler import load_grid
+from Data.Display import display_result
+from Data.Display import save_grid_to_file
+from Data.Grid import Grid
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    # HTTP over the server's Unix socket
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def connect(host="127.0.0.1", port=8765, socket_path=None):
+    if socket_path:
+        return UnixHTTPConnection(socket_path)
+    return http.client.HTTPConnection(host, port)
+
+def send_request(connection, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read() or b"{}")
+
+def display_metrics(metrics):
+    def milliseconds(value):
+        return f"{value * 1000:.2f}ms" if value is not None else "-"
+
+    print(f"Workers: {metrics['workers']} | pending {metrics['pending']}/{metrics['max_pending']} "
+          f"(queue depth {metrics['queue_depth']}) | latency p50 {milliseconds(metrics['latency_p50'])} "
+          f"p99 {milliseconds(metrics['latency_p99'])} | throughput {metrics['throughput']:.2f}/s "
+          f"(last minute {metrics['throughput_recent']:.2f}/s)")
+    print(f"Requests: {json.dumps(metrics['requests'])}")
+
+def client_execution(input_file, output_file, solutions, backtracking_engine="dpll", encoding="combinations",
+                     timeout=None, max_memory=None, host="127.0.0.1", port=8765, socket_path=None, metrics=False):
+    connection = connect(host, port, socket_path)
+
+    try:
+        if metrics:
+            status, payload = send_request(connection, "GET", "/metrics")
+            display_metrics(payload)
+            return
+
+        grid = load_grid(input_file)
+
+        for solution in solutions:
+            print(f"***{solution} solves the grid on the server***")
+            status, result = send_request(connection, "POST", "/solve", {
+                "id": input_file,
+                "grid": grid.to_rows(),
+                "solution": solution,
+                "encoding": encoding,
+                "backtracking_engine": backtracking_engine,
+                "timeout": timeout,
+                "max_memory": max_memory,
+            })
+
+            if status != 200 or "error" in result:
+                print(f"Server answered {status}: {result.get('error')}")
+                continue
+
+            solved_grid = Grid.from_rows(result["grid"])
+            if result["solvable"]:
+                display_result(grid, solved_grid, result["time"])
+                save_grid_to_file(output_file, solved_grid)
+            elif result["solvable"] is None:
+                print(f"Unknown ({result['budget']} budget exceeded): {grid.count('_') - solved_grid.count('_')} cells decided so far")
+                display_result(grid, solved_grid, result["time"])
+            else:
+                print("Unsolvable")
+            print(f"===>Round trip: {result['latency']:.5f}(s) on the server")
+            print("")
+    finally:
+        connection.close()
@@ -1,22 +1,245 @@
 import argparse
+import os
+import sys
 from UI.Execution import execution
-# Syntax: python main.py --size <number> --solution <pysat or bruteforce or backtracking>
+from UI.Execution import export_dimacs
+from UI.Execution import report_stats
+from Tasks.Stats import make_stats
+from Tasks.CNFs_Generation import ENCODINGS
+from Tasks.Engines import SOLUTIONS
+from Data.Cache import DEFAULT_CACHE_DIRECTORY
+from Data.Cache import DEFAULT_CACHE_SIZE
+from Data.Dimacs import MAP_SUFFIX
+from Tasks.Tiling import DEFAULT_OVERLAP
+from Tasks.Ordering import ORDERINGS
+from Tasks.Selection import DEFAULT_SELECTION_FILE
+# Syntax: python main.py --size <number> --solution <pysat or bruteforce or backtracking or cdcl or auto>
+#         python main.py --input <grid file> [--output <grid file>] --solution <name>
+#         python main.py dimacs <grid file> <.cnf or .cnf.gz file> [--encoding <name>]
+#         python main.py serve [--port <number> or --socket <path>] [--workers <number>] [--max-pending <number>]
+#         python main.py client --size <number> [--solutions <names>] [--port <number> or --socket <path>]
+#         python main.py batch <directory or .jsonl file or -> [--output <.jsonl file>] [--solution <name>] [--workers <number>]
+#         python main.py validate <directory or batch source> [--results <batch .jsonl file>] [--workers <number>]
 
-def command_line_interface():
+def batch_command_line_interface(argv):
+    parser = argparse.ArgumentParser(prog="main.py batch")
+
+    parser.add_argument('source', help="Directory of grid files, JSONL file of {\"id\", \"grid\"} puzzles, or - for stdin")
+    parser.add_argument('-o', '--output', default="-", help="JSONL file for the results (default: stdout)")
+    parser.add_argument('--solution', choices=SOLUTIONS, default="pysat", help="Which way to solve the grids?")
+    parser.add_argument('--backtracking-engine', choices=["dpll", "recursive"], default="dpll", help="Search used by the backtracking solution")
+    parser.add_argument('--encoding', choices=ENCODINGS, default="combinations", help="How each hint's \"exactly k traps\" constraint is written as clauses")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--pattern', default="input_*.txt", help="File name pattern when the source is a directory")
+    parser.add_argument('--validate', action='store_true', help="Check every solved grid against its puzzle's hints")
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    # Subcommand modules are imported once their subcommand runs, so the main mode does not load them
+    from UI.Batch import batch_execution
+    batch_execution(args.source, args.output, args.solution, args.encoding, args.workers,
+                    args.backtracking_engine, args.pattern, args.timeout, megabytes(args.max_memory),
+                    args.cache, megabytes(args.cache_size), args.validate)
+
+def validate_command_line_interface(argv):
+    parser = argparse.ArgumentParser(prog="main.py validate")
+
+    parser.add_argument('source', help="Directory of input_*/output_* grid files, or with --results the batch run's source")
+    parser.add_argument('--results', default=None, metavar='FILE', help="JSONL results of a batch run to check against the source's puzzles")
+    parser.add_argument('-o', '--output', default=None, metavar='FILE', help="Write one JSON report per solution to this file")
+    parser.add_argument('--pattern', default="input_*.txt", help="File name pattern of the puzzles when the source is a directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+
+    args = parser.parse_args(argv)
+
+    from UI.Validate import validate_execution
+    if not validate_execution(args.source, args.results, args.output, args.pattern, args.workers):
+        sys.exit(1)
+
+def dimacs_command_line_interface(argv):
+    parser = argparse.ArgumentParser(prog="main.py dimacs")
+
+    parser.add_argument('input', help="Grid file (text or binary)")
+    parser.add_argument('output', help="DIMACS file to write, gzip-compressed when it ends with .gz")
+    parser.add_argument('--encoding', choices=ENCODINGS, default="combinations", help="How each hint's \"exactly k traps\" constraint is written as clauses")
+    parser.add_argument('--no-map', action='store_true', help=f"Do not write the variable-to-cell map (<output>{MAP_SUFFIX})")
 
+    args = parser.parse_args(argv)
+
+    export_dimacs(args.input, args.output, args.encoding, not args.no_map)
+
+def add_budget_arguments(parser):
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS', help="Stop a solver after this long and report the cells decided so far")
+    parser.add_argument('--max-memory', type=int, default=None, metavar='MB', help="Stop a solver once the process uses more memory than this")
+
+def add_cache_arguments(parser):
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_DIRECTORY, default=None, metavar='DIRECTORY', help=f"Reuse CNFs and solutions stored on disk (default directory: {DEFAULT_CACHE_DIRECTORY})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024), metavar='MB', help="Evict the least recently used entries above this size")
+
+def megabytes(value):
+    return value * 1024 * 1024 if value is not None else None
+
+# Options of the main mode that only make sense in this process, not on the solve server
+LOCAL_ONLY_OPTIONS = ["presolve", "unique", "enumerate", "probabilities", "decompose", "portfolio", "dimacs", "model", "cache",
+                      "stats", "profile", "tile"]
+
+# Options of the main mode that need the whole grid's CNF, which --tile never builds
+WHOLE_CNF_OPTIONS = ["unique", "enumerate", "probabilities", "decompose", "portfolio", "dimacs", "model", "cache"]
+
+# Options of the main mode that do something without --solutions
+QUERY_OPTIONS = ["unique", "enumerate", "probabilities", "portfolio", "tile", "model"]
+
+def testcase_filenames():
     filename = {}
     filename[5] = ["testcases/input_1.txt", "testcases/output_1.txt"]
     filename[11] = ["testcases/input_2.txt", "testcases/output_2.txt"]
     filename[20] = ["testcases/input_3.txt", "testcases/output_3.txt"]
+    return filename
+
+def default_output(input_file):
+    # boards/input_7.txt -> boards/output_7.txt, big.grid -> big.solved.grid
+    directory, name = os.path.split(input_file)
+    if "input" in name:
+        return os.path.join(directory, name.replace("input", "output", 1))
+    stem, extension = os.path.splitext(name)
+    return os.path.join(directory, f"{stem}.solved{extension}")
 
-    parser = argparse.ArgumentParser()
+def puzzle_files(parser, args):
+    # (input, output) of the main mode: a bundled testcase by --size, or any grid file by --input
+    if args.input:
+        return args.input, args.output or default_output(args.input)
+    if args.output:
+        parser.error("--output needs --input")
+    return testcase_filenames().get(args.size)
 
-    parser.add_argument('-s', '--size', type=int, required=True, help="Size of the grid (n x n)")
-    parser.add_argument('--solutions', nargs='+', required=True, help="Which way to solve the grid?")    
+def build_parser(prog=None, size_required=True):
+    parser = argparse.ArgumentParser(prog=prog)
+
+    sources = parser.add_mutually_exclusive_group(required=size_required)
+    sources.add_argument('-s', '--size', type=int, help="Size of a bundled testcase grid (5, 11 or 20)")
+    sources.add_argument('-i', '--input', metavar='FILE', help="Solve this grid file (text or binary) instead of a bundled testcase")
+    parser.add_argument('-o', '--output', metavar='FILE', help="Where --input's solution is written (default: next to the input, input -> output in the name or .solved added)")
+    parser.add_argument('--solutions', nargs='+', choices=SOLUTIONS + ["auto"], default=[], help="Which way to solve the grid? (auto: pick one from the grid's features)")    
+    parser.add_argument('--auto-config', default=None, metavar='FILE', help=f"Selection rules for --solutions auto, written by Benchmark.py calibrate (default: {DEFAULT_SELECTION_FILE})")
+    parser.add_argument('--backtracking-engine', choices=["dpll", "recursive"], default="dpll", help="Search used by the backtracking solution")
+    parser.add_argument('--encoding', choices=ENCODINGS, default="combinations", help="How each hint's \"exactly k traps\" constraint is written as clauses")
+    parser.add_argument('--bruteforce-engine', choices=["recursive", "bitmask"], default="recursive", help="Search used by the bruteforce solution")
+    parser.add_argument('--presolve', action='store_true', help="Decide cells with simple Minesweeper rules before building the CNF")
+    parser.add_argument('--unique', action='store_true', help="Check with an incremental pysat session whether the solution is unique")
+    parser.add_argument('--enumerate', type=int, default=0, metavar='N', help="Stream up to N distinct solutions from an incremental pysat session")
+    parser.add_argument('--probabilities', action='store_true', help="Print P(trap) of every blank cell over all solutions, counted exactly")
+    parser.add_argument('--traps', type=int, default=None, metavar='N', help="With --probabilities, only count solutions with N traps in total")
+    parser.add_argument('--decompose', action='store_true', help="Split the CNF into independent components and solve them in parallel")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for --decompose and the bitmask brute force (default: all cores)")
+    parser.add_argument('--portfolio', action='store_true', help="Race the --solutions engines (default: all) in parallel processes and keep the first answer")
+    parser.add_argument('--dimacs', metavar='FILE', help="Solve a pre-generated DIMACS CNF of the grid instead of encoding it")
+    parser.add_argument('--model', metavar='FILE', help="Fill the grid with an external SAT solver's model of the CNF instead of solving it")
+    parser.add_argument('--ordering', choices=ORDERINGS, default="natural", help="Reorder clauses and literals along a traversal of the variable graph before solving (helps the clause-by-clause backtracking)")
+    parser.add_argument('--tile', type=int, default=None, metavar='SIZE', help="Solve SIZE x SIZE tiles through overlapping windows in parallel, then reconcile their seams (pysat, for very large grids)")
+    parser.add_argument('--overlap', type=int, default=DEFAULT_OVERLAP, metavar='N', help=f"Cells a --tile window reaches past its tile (default and minimum: {DEFAULT_OVERLAP})")
+    parser.add_argument('--stats', choices=["text", "json"], default=None, help="Report per-phase timings, solver counters and peak memory")
+    parser.add_argument('--stats-file', default=None, metavar='FILE', help="Write the --stats json report to this file instead of stdout")
+    parser.add_argument('--profile', default=None, metavar='FILE', help="Profile the timed phases with cProfile and save the profile to this file")
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+
+    return parser
+
+def add_server_address_arguments(parser):
+    parser.add_argument('--host', default="127.0.0.1", help="Address of the solve server (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Port of the solve server (default: 8765)")
+    parser.add_argument('--socket', default=None, metavar='PATH', help="Unix socket of the solve server, instead of host and port")
+
+def serve_command_line_interface(argv):
+    parser = argparse.ArgumentParser(prog="main.py serve")
+
+    add_server_address_arguments(parser)
+    parser.add_argument('--workers', type=int, default=None, help="Warm solver processes (default: all cores)")
+    parser.add_argument('--max-pending', type=int, default=None, metavar='N', help="Requests queued or running before new ones get 503 (default: 4 per worker)")
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    from UI.Server import serve_execution
+    serve_execution(args.host, args.port, args.socket, args.workers, args.max_pending, args.timeout,
+                    megabytes(args.max_memory), args.cache, megabytes(args.cache_size))
+
+def client_command_line_interface(argv):
+    # The main mode's arguments, sent to a running solve server
+    parser = build_parser("main.py client", size_required=False)
+    add_server_address_arguments(parser)
+    parser.add_argument('--metrics', action='store_true', help="Print the server's metrics instead of solving")
+
+    args = parser.parse_args(argv)
+
+    for option in LOCAL_ONLY_OPTIONS:
+        if getattr(args, option):
+            parser.error(f"--{option} is not available through the solve server")
+    if args.ordering != "natural":
+        parser.error("--ordering is not available through the solve server")
+    if "auto" in args.solutions:
+        parser.error("--solutions auto is not available through the solve server")
+
+    from UI.Client import client_execution
+    files = None if args.metrics else puzzle_files(parser, args)
+    if args.metrics:
+        client_execution(None, None, [], host=args.host, port=args.port, socket_path=args.socket, metrics=True)
+    elif files is None:
+        print("Invalid size")
+    else:
+        client_execution(files[0], files[1], args.solutions or ["pysat"],
+                         args.backtracking_engine, args.encoding, args.timeout, megabytes(args.max_memory),
+                         args.host, args.port, args.socket)
+
+def command_line_interface():
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        return batch_command_line_interface(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "dimacs":
+        return dimacs_command_line_interface(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return serve_command_line_interface(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "client":
+        return client_command_line_interface(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "validate":
+        return validate_command_line_interface(sys.argv[2:])
+
+    parser = build_parser()
 
     args = parser.parse_args()
 
-    if filename.get(args.size) is None:
+    # Without one of these a run would only build the CNF and exit
+    if not args.solutions and not any(getattr(args, option) for option in QUERY_OPTIONS):
+        parser.error("nothing to do: give --solutions or one of " + ", ".join(f"--{option}" for option in QUERY_OPTIONS))
+
+    if args.bruteforce_engine == "bitmask" and "bruteforce" in args.solutions:
+        # The bitmask engine searches the grid's hints directly and never sees the CNF
+        if args.dimacs or args.ordering != "natural" or args.encoding != "combinations":
+            parser.error("--bruteforce-engine bitmask reads the grid, not the CNF: it cannot be combined with "
+                         "--dimacs, --ordering or another --encoding")
+        # --decompose and --portfolio solve through solve_model, whose brute force is the
+        # recursive engine; the bitmask engine already splits the grid into components
+        if args.decompose or args.portfolio:
+            parser.error("--bruteforce-engine bitmask cannot be combined with --decompose or --portfolio")
+
+    if args.tile is not None:
+        if args.tile < 1 or args.overlap < DEFAULT_OVERLAP:
+            parser.error(f"--tile needs a positive size and an --overlap of at least {DEFAULT_OVERLAP}")
+        for option in WHOLE_CNF_OPTIONS:
+            if getattr(args, option):
+                parser.error(f"--{option} needs the whole grid's CNF and cannot be used with --tile")
+        if any(solution != "pysat" for solution in args.solutions):
+            parser.error("--tile solves with pysat only")
+
+    files = puzzle_files(parser, args)
+    if files is None:
         print("Invalid size")
     else:
-        execution(filename[args.size][0], filename[args.size][1], args.solutions)    
\ No newline at end of file
+        stats = make_stats(args.stats is not None, args.profile is not None)
+        # The run takes memory sizes in bytes
+        args.max_memory = megabytes(args.max_memory)
+        args.cache_size = megabytes(args.cache_size)
+        execution(files[0], files[1], args, stats)
+        report_stats(stats, args.stats, args.stats_file, args.profile)
\ No newline at end of file
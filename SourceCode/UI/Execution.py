@@ -1,45 +1,382 @@
+import json
+import time
 from Data.DataHandler import load_grid
 from Data.DataHandler import save_grid_to_file
+from Data.DataHandler import fill_result
+from Data.DataHandler import fill_partial
 from Data.Display import display_result
+from Data.Display import display_cnf_summary
+from Data.Display import display_presolve_summary
+from Data.Display import display_ordering_summary
+from Data.Display import display_selection
+from Data.Display import display_solver_calls
+from Data.Display import display_grid
+from Data.Display import display_cache_stats
+from Data.Display import display_probabilities
+from Data.Display import display_counting_stats
+from Data.Display import display_stats
+from Data.Display import display_profile
+from Data.Display import display_search_stats
 from Tasks.CNFs_Generation import generate_CNF_s
-from Tasks.Backtracking import btSat
-from Tasks.BruteForce import bfSat
-from Tasks.PySat import pySat
+from Tasks.CNFs_Generation import iter_CNF_s
+from Tasks.CNFs_Generation import stream_CNF_s
+from Tasks.Engines import SOLUTIONS
+from Tasks.Engines import load_engine
+from Tasks.Presolve import presolve_grid
+from Tasks.Budget import make_budget
+from Tasks.Budget import BudgetExceeded
+from Tasks.Budget import SearchTooLarge
+from Tasks.Stats import NULL_STATS
+from Tasks.Stats import Stats
 
-def execute_brute_force(grid, cnfs):
-    return bfSat(grid, cnfs)    
+# Like the engines, the modules behind a flag (cache, DIMACS, tiles, decomposition,
+# portfolio, ordering, auto selection, model counting) are imported by the code that
+# uses them, so a run does not pay at start-up for features it never asked for.
 
-def execute_back_tracking(grid, cnfs):
-    return btSat(grid, cnfs)
+def execute_brute_force(grid, cnfs, engine="recursive", workers=None, budget=None, stats=NULL_STATS):
+    return load_engine("bruteforce").bfSat(grid, cnfs, engine, workers, budget, stats)    
 
-def execute_pysat(grid, cnfs):
-    return pySat(grid, cnfs)
+def execute_back_tracking(grid, cnfs, engine="dpll", budget=None, stats=NULL_STATS):
+    # The solvers only count; the search line is printed here, from their counters
+    search_stats = stats if stats.enabled else Stats()
+    grid, solvable, total_time = load_engine("backtracking").btSat(grid, cnfs, engine, budget, search_stats)
+    display_search_stats(engine, search_stats.own_counters(), total_time)
+    return grid, solvable, total_time
+
+def execute_pysat(grid, cnfs, budget=None, stats=NULL_STATS):
+    return load_engine("pysat").pySat(grid, cnfs, budget, stats)
+
+def execute_cdcl(grid, cnfs, budget=None, stats=NULL_STATS):
+    search_stats = stats if stats.enabled else Stats()
+    grid, solvable, total_time = load_engine("cdcl").cdclSat(grid, cnfs, budget, search_stats)
+    display_search_stats("cdcl", search_stats.own_counters(), total_time)
+    return grid, solvable, total_time
+
+def execute_portfolio(grid, cnfs, solutions, engine="dpll", budget=None, stats=NULL_STATS):
+    from Tasks.Portfolio import portfolioSat
+    return portfolioSat(grid, cnfs, solutions, engine, budget, stats)
+
+def execute_model(grid, cnfs, model_file, stats=NULL_STATS):
+    # An external solver's answer for the CNF, read back instead of solving
+    from Data.Dimacs import read_model
+    from Data.Dimacs import satisfies
+
+    start_time = time.time()
+    with stats.phase("load"):
+        model, solvable = read_model(model_file)
+        if solvable and not satisfies(cnfs, model):
+            raise ValueError(f"{model_file}: the model does not satisfy the CNF")
+    end_time = time.time()
+
+    total_time = end_time - start_time
+
+    with stats.phase("fill"):
+        grid = fill_result(grid, model) if solvable is not None else fill_partial(grid, model)
+    return grid, solvable, total_time
+
+def report_stats(stats, stats_format=None, stats_file=None, profile_file=None):
+    # After a run: the stats as text or JSON (to stats_file or stdout), and the profile
+    if not stats.enabled:
+        return
+
+    if stats_format == "json":
+        text = json.dumps(stats.to_dict(), indent=2)
+        if stats_file:
+            with open(stats_file, "w") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    elif stats_format == "text":
+        display_stats(stats.to_dict())
+
+    if profile_file and stats.profiler is not None:
+        stats.profiler.dump_stats(profile_file)
+        display_profile(stats.profiler, profile_file)
+
+def export_dimacs(input_file, output_file, encoding="combinations", variable_map=True):
+    # Clauses go from the generator straight into the file, the CNF is never a list
+    from Data.Dimacs import DimacsWriter
+    from Data.Dimacs import write_variable_map
 
-def execution(input_file, output_file, solutions):
     grid = load_grid(input_file)
 
+    start_time = time.time()
+    with DimacsWriter(output_file, [f"{input_file}: {grid.rows}x{grid.cols} grid, {encoding} encoding"]) as writer:
+        stream_CNF_s(grid, writer.add_clause, encoding)
+    if variable_map:
+        write_variable_map(output_file, grid, writer.variables)
+
+    print(f"DIMACS ({encoding}): {writer.clauses} clauses, {writer.variables} variables written to {output_file} "
+          f"in {time.time() - start_time:.5f}(s)")
+
+def cache_solver_key(solution, solutions, portfolio, decompose, backtracking_engine, bruteforce_engine):
+    # What produced a cached model: the solver plus the options that change its answer
+    if portfolio:
+        return "portfolio:" + ",".join(solutions or SOLUTIONS)
+    if solution == "backtracking":
+        solution += ":" + backtracking_engine
+    elif solution == "bruteforce":
+        solution += ":" + bruteforce_engine
+    return ("decompose:" if decompose else "") + solution
+
+# options: the main mode's parsed command line (UI.CommandLine.build_parser), with
+# --max-memory and --cache-size already in bytes. A new flag only needs reading here.
+def execution(input_file, output_file, options, stats=NULL_STATS):
+    solutions = options.solutions
+    encoding = options.encoding
+    backtracking_engine = options.backtracking_engine
+    bruteforce_engine = options.bruteforce_engine
+    decompose = options.decompose
+    portfolio = options.portfolio
+    workers = options.workers
+    presolve = options.presolve
+    unique = options.unique
+    enumerate_limit = options.enumerate
+    probabilities = options.probabilities
+    traps = options.traps
+    timeout = options.timeout
+    max_memory = options.max_memory
+    dimacs_file = options.dimacs
+    model_file = options.model
+    tile_size = options.tile
+    overlap = options.overlap
+    ordering = options.ordering
+    auto_config = options.auto_config
+    cache_directory = options.cache
+    cache_size = options.cache_size
+
+    with stats.phase("parse"):
+        grid = load_grid(input_file)
+    # Cache entries are keyed by the encoding, which says nothing about a CNF read from a file
+    cache = None
+    if cache_directory and not dimacs_file:
+        from Data.Cache import Cache
+        from Data.Cache import model_from_grids
+        cache = Cache(cache_directory, cache_size)
+
     previous_grid = grid.copy()
 
-    cnfs = generate_CNF_s(grid)
+    if presolve:
+        start_time = time.time()
+        with stats.phase("presolve"):
+            residual, fixed = presolve_grid(grid)
+        presolve_time = time.time() - start_time
 
-    solvable = False
-    total_time = -1.0
-    
-    for solution in solutions:
-        if solution == "bruteforce":
+        if residual is None:
+            print("Unsolvable (presolve found contradicting hints)")
+            return
+
+        # Solvers only see the residual grid; the decided cells are already written in it
+        # as 'T'/'G', so fill_result carries them into the solved grid
+        clauses_before = sum(1 for _ in iter_CNF_s(grid, encoding))
+        clauses_after = sum(1 for _ in iter_CNF_s(residual, encoding))
+        display_presolve_summary(grid, residual, fixed, clauses_before, clauses_after, presolve_time)
+
+        grid = residual
+
+    if tile_size:
+        # Tiles build one small CNF per window; the whole grid is never encoded at once
+        from Tasks.Tiling import tiled_solve
+        print(f"***pysat solves {tile_size}x{tile_size} tiles***")
+        budget = make_budget(timeout, max_memory)
+        solved, solvable, total_time = tiled_solve(grid, tile_size, overlap, encoding, workers, budget, stats.scope("tiled"))
+        if solvable:
+            display_result(previous_grid, solved, total_time)
+            print("")
+            with stats.phase("write"):
+                save_grid_to_file(output_file, solved)
+        elif solvable is None:
+            reason = f"{budget.reason} " if budget is not None and budget.reason else ""
+            print(f"Unknown ({reason}budget exceeded)")
+        else:
+            print("Unsolvable")
+        return
+
+    if dimacs_file:
+        from Data.Dimacs import read_variable_map
+        from Data.Dimacs import read_dimacs
+        # A pre-generated CNF is only valid for the grid it was written for
+        written_for = read_variable_map(dimacs_file)
+        if written_for is not None and written_for != grid:
+            print(f"{dimacs_file} was written for a different grid")
+            return
+
+    start_time = time.time()
+    with stats.phase("cnf"):
+        if dimacs_file:
+            cnfs = read_dimacs(dimacs_file)
+        else:
+            cnfs = cache.get_cnf(grid, encoding) if cache else None
+        if cnfs is None:
+            cnfs = generate_CNF_s(grid, encoding)
+            if cache:
+                cache.put_cnf(grid, encoding, cnfs)
+    generation_time = time.time() - start_time
+
+    if stats.enabled:
+        stats.set("clauses", len(cnfs))
+        stats.set("variables", len({abs(lit) for clause in cnfs for lit in clause}))
+
+    display_cnf_summary(dimacs_file or encoding, cnfs, generation_time)
+
+    if "auto" in solutions:
+        # "auto" becomes the solver (and encoding) the selection rules expect to be fastest
+        from Tasks.Selection import extract_features
+        from Tasks.Selection import load_rules
+        from Tasks.Selection import select_engine
+        start_time = time.time()
+        with stats.phase("select"):
+            features = extract_features(grid, cnfs)
+            chosen, chosen_encoding, rule = select_engine(features, load_rules(auto_config))
+        display_selection(features, chosen, chosen_encoding, rule, time.time() - start_time)
+        stats.scope("select").update(features)
+
+        solutions = list(dict.fromkeys(chosen if solution == "auto" else solution for solution in solutions))
+        if chosen_encoding != encoding and not dimacs_file:
+            # A read DIMACS file keeps its own encoding
+            encoding = chosen_encoding
+            start_time = time.time()
+            with stats.phase("cnf"):
+                cnfs = cache.get_cnf(grid, encoding) if cache else None
+                if cnfs is None:
+                    cnfs = generate_CNF_s(grid, encoding)
+                    if cache:
+                        cache.put_cnf(grid, encoding, cnfs)
+            display_cnf_summary(encoding, cnfs, time.time() - start_time)
+
+    if ordering != "natural":
+        # Every run below sees the reordered clauses; the cache keeps the CNF as generated
+        from Tasks.Ordering import reorder_CNF_s
+        from Tasks.Ordering import check_delay
+        start_time = time.time()
+        with stats.phase("ordering"):
+            reordered = reorder_CNF_s(cnfs, ordering)
+        ordering_time = time.time() - start_time
+        display_ordering_summary(ordering, check_delay(cnfs), check_delay(reordered), ordering_time)
+        cnfs = reordered
+
+    if unique:
+        print("***pysat checks uniqueness***")
+        with stats.phase("unique"):
+            is_unique, calls, cold = load_engine("pysat").pysat_uniqueness(grid, cnfs)
+        if is_unique is None:
+            print("No solution")
+        else:
+            print("The solution is unique" if is_unique else "The grid has more than one solution")
+        display_solver_calls(calls)
+        if cold is not None:
+            print(f"  second call from a fresh solver: {cold['time']:.5f}(s), {cold['conflicts']} conflicts, "
+                  f"{cold['decisions']} decisions, {cold['propagations']} propagations")
+        print("")
+
+    if enumerate_limit > 0:
+        print(f"***pysat enumerates up to {enumerate_limit} solutions***")
+        calls = []
+        count = 0
+        with stats.phase("enumerate"):
+            for solved_grid in load_engine("pysat").pysat_enumerate(grid, cnfs, enumerate_limit, calls):
+                count += 1
+                print(f"Solution {count}:")
+                display_grid(solved_grid)
+        print(f"Found {count} distinct solution(s)")
+        display_solver_calls(calls)
+        print("")
+
+    if probabilities:
+        from Tasks.ModelCounter import trap_probabilities
+        print("***Model counting computes P(trap) per cell***" if traps is None else
+              f"***Model counting computes P(trap) per cell, with {traps} traps in total***")
+        start_time = time.time()
+        try:
+            with stats.phase("probabilities"):
+                cell_probabilities, number_of_solutions, counter = trap_probabilities(grid, traps, make_budget(timeout, max_memory))
+        except BudgetExceeded as error:
+            print(f"Unknown ({error} budget exceeded)")
+        else:
+            if cell_probabilities is None:
+                print("No solution")
+            else:
+                display_probabilities(grid, cell_probabilities)
+                display_counting_stats(number_of_solutions, counter, time.time() - start_time)
+        print("")
+
+    # A portfolio is a single run racing every requested engine (all of them by default)
+    runs = ["portfolio"] if portfolio else solutions
+    if model_file:
+        runs = ["model"]
+
+    # Every run starts from the puzzle (the presolve residual, if any), never from the grid
+    # an earlier run filled in; its cache entries are all named after that puzzle
+    puzzle_key = cache.puzzle_key(grid, encoding) if cache else None
+    for solution in runs:
+        # Every run gets its own time and memory budget (None when unlimited)
+        budget = make_budget(timeout, max_memory)
+        solver_key = cache_solver_key(solution, solutions, portfolio, decompose, backtracking_engine, bruteforce_engine)
+        run_stats = stats.scope(solver_key)
+        too_large = None
+        bad_model = None
+        solved_grid, solvable, total_time = grid, False, -1.0
+
+        cached = cache.get_model(puzzle_key, solver_key) if cache and solution != "model" else None
+        if cached is not None:
+            print(f"***{solver_key} answered from the cache***")
+            start_time = time.time()
+            with run_stats.phase("fill"):
+                model, solvable = cached
+                solved_grid = fill_result(grid, model) if solvable else grid
+            total_time = time.time() - start_time
+        elif solution == "model":
+            print(f"***Model of an external solver read from {model_file}***")
+            try:
+                solved_grid, solvable, total_time = execute_model(grid, cnfs, model_file, run_stats)
+            except ValueError as error:
+                bad_model = error
+                solved_grid, solvable, total_time = grid, None, 0.0
+        elif solution == "portfolio":
+            engines = solutions or SOLUTIONS
+            print(f"***Portfolio races {', '.join(engines)}***")
+            solved_grid, solvable, total_time = execute_portfolio(grid, cnfs, engines, backtracking_engine, budget, run_stats)
+        elif decompose:
+            from Tasks.Decomposition import decomposed_solve
+            print(f"***{solution} solves independent components***")
+            solved_grid, solvable, total_time = decomposed_solve(grid, cnfs, solution, workers, backtracking_engine, budget, run_stats)
+        elif solution == "bruteforce":
             print("***Brute-force solves CNFs***")
-            grid, solvable, total_time = execute_brute_force(grid, cnfs)            
+            try:
+                solved_grid, solvable, total_time = execute_brute_force(grid, cnfs, bruteforce_engine, workers, budget, run_stats)
+            except SearchTooLarge as error:
+                too_large = error
+                solved_grid, solvable, total_time = grid, None, 0.0
         elif solution == "backtracking":
             print("***Backtracking solves CNFs***")
-            grid, solvable, total_time = execute_back_tracking(grid, cnfs)            
+            solved_grid, solvable, total_time = execute_back_tracking(grid, cnfs, backtracking_engine, budget, run_stats)            
         elif solution == "pysat":
             print("***pysat library solves CNFs***")
-            grid, solvable, total_time = execute_pysat(grid, cnfs)            
+            solved_grid, solvable, total_time = execute_pysat(grid, cnfs, budget, run_stats)            
+        elif solution == "cdcl":
+            print("***CDCL solves CNFs***")
+            solved_grid, solvable, total_time = execute_cdcl(grid, cnfs, budget, run_stats)
+
+        if cache and cached is None and solution != "model" and too_large is None:
+            cache.put_model(puzzle_key, solver_key, model_from_grids(grid, solved_grid), solvable)
     
         if solvable:
-            display_result(previous_grid, grid, total_time)
+            display_result(previous_grid, solved_grid, total_time)
             print("")
 
-            save_grid_to_file(output_file, grid)
+            with run_stats.phase("write"):
+                save_grid_to_file(output_file, solved_grid)
+        elif too_large is not None:
+            print(f"Unknown ({too_large})")
+        elif bad_model is not None:
+            print(f"Invalid model ({bad_model})")
+        elif solvable is None:
+            reason = f"{budget.reason} " if budget is not None and budget.reason else ""
+            print(f"Unknown ({reason}budget exceeded): {previous_grid.count('_') - solved_grid.count('_')} cells decided so far")
+            display_result(previous_grid, solved_grid, total_time)
+            print("")
         else:
-            print("Unsolvable")
\ No newline at end of file
+            print("Unsolvable")
+
+    if cache:
+        display_cache_stats(cache)
\ No newline at end of file
@@ -0,0 +1,272 @@
+import asyncio
+import collections
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Data.Cache import DEFAULT_CACHE_SIZE
+from Tasks.Engines import SOLUTIONS
+from Tasks.CNFs_Generation import ENCODINGS
+from UI.Batch import init_worker
+from UI.Batch import solve_puzzle
+from UI.Batch import parse_grid
+from UI.Batch import TASKS_PER_WORKER
+
+# Latencies kept for the p50/p99 metrics, and the window of the recent throughput
+LATENCY_WINDOW = 1000
+THROUGHPUT_WINDOW = 60.0
+
+# Seconds a request may run on a worker past its solver budget before the server gives up on it
+TIMEOUT_GRACE = 1.0
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+def warm_up():
+    # The engines are loaded by the pool's initializer (all of them: any request may ask
+    # for any engine); this only makes the pool start a worker before the first request
+    return os.getpid()
+
+def budget_value(request, name):
+    # A request's "timeout"/"max_memory": None or a non-negative number
+    value = request.get(name)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+        raise ValueError(f"{name} must be a non-negative number")
+    return value
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+# Solve service: an asyncio HTTP/1.1 front end (localhost TCP or a Unix socket) in front of
+# a pool of worker processes that import the solvers once and then run the batch mode's
+# solve_puzzle for every request. Requests queue in the front end until a worker is free,
+# and at most max_pending are accepted at a time (queued or running); past that the server
+# answers 503 at once instead of queueing without bound. Each request gets a solver budget
+# (its "timeout" and "max_memory", each capped by the server's) and is answered 504 if it
+# overruns it on a worker.
+#   POST /solve    {"grid": rows or text, "solution", "encoding", "backtracking_engine", "timeout", "max_memory"}
+#   GET  /metrics  queue depth, latency percentiles, throughput
+#   GET  /health
+class SolveServer:
+    def __init__(self, workers=None, max_pending=None, timeout=None, max_memory=None,
+                 cache_directory=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * TASKS_PER_WORKER
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(cache_directory, cache_size, SOLUTIONS))
+        self.warm_workers = 0
+
+        self.pending = 0
+        self.waiting = 0
+        self.loop = None
+        self.free_workers = None
+        self.counters = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.completions = collections.deque()
+        self.started = time.monotonic()
+        self.next_id = 0
+
+    def warm(self):
+        # Starts workers (and their solver imports) before the first request arrives. A worker
+        # may take several of these tasks, so the count is of the workers actually started
+        futures = [self.executor.submit(warm_up) for _ in range(self.workers)]
+        self.warm_workers = len({future.result() for future in futures})
+        return self.warm_workers
+
+    def metrics(self):
+        now = time.monotonic()
+        while self.completions and now - self.completions[0] > THROUGHPUT_WINDOW:
+            self.completions.popleft()
+        uptime = now - self.started
+
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "running": self.pending - self.waiting,
+            "queue_depth": self.waiting,
+            "max_pending": self.max_pending,
+            "requests": dict(self.counters),
+            "latency_p50": percentile(self.latencies, 0.50),
+            "latency_p99": percentile(self.latencies, 0.99),
+            "throughput": self.counters["completed"] / uptime if uptime else 0.0,
+            "throughput_recent": len(self.completions) / min(uptime, THROUGHPUT_WINDOW) if uptime else 0.0,
+            "uptime": uptime,
+        }
+
+    async def solve(self, request):
+        if self.pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            return 503, {"error": "queue full", "pending": self.pending}
+
+        try:
+            grid = parse_grid(request["grid"])
+            solution = request.get("solution", "pysat")
+            encoding = request.get("encoding", "combinations")
+            backtracking_engine = request.get("backtracking_engine", "dpll")
+            if solution not in SOLUTIONS or encoding not in ENCODINGS or backtracking_engine not in ("dpll", "recursive"):
+                raise ValueError("unknown solution, encoding or backtracking engine")
+            # A request can only tighten the server's limits, never lift them
+            timeouts = [t for t in (budget_value(request, "timeout"), self.timeout) if t is not None]
+            timeout = min(timeouts) if timeouts else None
+            memories = [m for m in (budget_value(request, "max_memory"), self.max_memory) if m is not None]
+            max_memory = min(memories) if memories else None
+        except (KeyError, TypeError, ValueError) as error:
+            self.counters["bad_requests"] += 1
+            return 400, {"error": f"{type(error).__name__}: {error}"}
+
+        self.next_id += 1
+        puzzle_id = request.get("id", self.next_id)
+
+        self.pending += 1
+        start_time = time.monotonic()
+        try:
+            # Requests wait here, in arrival order, for a free worker; a worker is only
+            # handed back once its task is really over, even if the request timed out
+            self.waiting += 1
+            try:
+                await self.free_workers.acquire()
+            finally:
+                self.waiting -= 1
+            future = self.executor.submit(solve_puzzle, puzzle_id, grid, solution, encoding,
+                                          backtracking_engine, timeout, max_memory)
+            future.add_done_callback(lambda _: self.loop.call_soon_threadsafe(self.free_workers.release))
+
+            waiting = asyncio.shield(asyncio.wrap_future(future))
+            result = await asyncio.wait_for(waiting, timeout + TIMEOUT_GRACE if timeout is not None else None)
+        except asyncio.TimeoutError:
+            self.counters["timed_out"] += 1
+            return 504, {"id": puzzle_id, "error": "timed out"}
+        finally:
+            self.pending -= 1
+
+        latency = time.monotonic() - start_time
+        self.latencies.append(latency)
+        self.completions.append(time.monotonic())
+        self.counters["completed"] += 1
+        if "error" in result:
+            self.counters["failed"] += 1
+
+        result["latency"] = latency
+        return 200, result
+
+    async def route(self, method, path, body):
+        if path == "/solve":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError as error:
+                return 400, {"error": f"invalid JSON: {error}"}
+            if not isinstance(request, dict):
+                return 400, {"error": "the request must be a JSON object"}
+            return await self.solve(request)
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path == "/health":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"no route for {path}"}
+
+    async def handle(self, reader, writer):
+        # One connection, any number of keep-alive requests
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("ascii").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self.respond(writer, 413, {"error": "request too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    status, payload = await self.route(method, path.split("?")[0], body)
+                except Exception as error:
+                    # A bug in one request must not drop the connection without an answer
+                    self.counters["errors"] += 1
+                    status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("ascii") + b"\r\n" + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8765, socket_path=None):
+        self.loop = asyncio.get_running_loop()
+        self.free_workers = asyncio.Semaphore(self.workers)
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = f"http://{host}:{port}"
+
+        print(f"Serving on {address} with {self.warm_workers} of {self.workers} workers warm, up to {self.max_pending} pending requests",
+              file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def serve_execution(host="127.0.0.1", port=8765, socket_path=None, workers=None, max_pending=None, timeout=None,
+                    max_memory=None, cache_directory=None, cache_size=DEFAULT_CACHE_SIZE):
+    server = SolveServer(workers, max_pending, timeout, max_memory, cache_directory, cache_size)
+    server.warm()
+
+    # kill (SIGTERM) shuts down like Ctrl-C: workers stopped, socket file removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(server.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,107 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Data.DataHandler import load_grid
+from Data.Validation import validate_grids
+from Data.Display import display_validation_report
+from UI.Batch import read_puzzles
+from UI.Batch import parse_grid
+
+# Pairs handed to a worker at a time: enough to stack many grids into one NumPy check
+PAIRS_PER_TASK = 256
+
+def output_filename(input_file):
+    # testcases/input_3.txt -> testcases/output_3.txt
+    directory, name = os.path.split(input_file)
+    return os.path.join(directory, name.replace("input", "output", 1))
+
+def directory_pairs(directory, pattern="input_*.txt"):
+    for input_file in sorted(glob.glob(os.path.join(directory, pattern))):
+        yield input_file, input_file, output_filename(input_file)
+
+def result_pairs(source, results_file, pattern="input_*.txt", skipped=None):
+    # Solved grids of a batch run (JSONL results) next to the puzzles they were solved from.
+    # Unsolvable, unknown and failed results have no solution to check; they are counted in `skipped`
+    solved = {}
+    with open(results_file) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("solvable"):
+                solved[result["id"]] = result["grid"]
+            elif skipped is not None:
+                skipped.append(result.get("id"))
+
+    for puzzle_id, grid, error in read_puzzles(source, pattern):
+        if puzzle_id in solved:
+            # An unreadable puzzle is handed over as its error and reported by validate_chunk
+            yield puzzle_id, (ValueError(error) if error is not None else grid), solved[puzzle_id]
+
+def validate_chunk(chunk):
+    # chunk: (id, puzzle, solution), each a grid, a file name or JSONL rows
+    pairs = []
+    reports = {}
+
+    for position, (puzzle_id, grid, solved_grid) in enumerate(chunk):
+        try:
+            if isinstance(grid, Exception):
+                raise grid
+            if isinstance(grid, str):
+                grid = load_grid(grid)
+            if isinstance(solved_grid, str):
+                solved_grid = load_grid(solved_grid)
+            elif isinstance(solved_grid, list):
+                solved_grid = parse_grid(solved_grid)
+            pairs.append((puzzle_id, grid, solved_grid))
+        except (OSError, ValueError) as error:
+            reports[position] = {"id": puzzle_id, "valid": False, "cells": 0, "issues": {"unreadable": 1},
+                                 "error": f"{type(error).__name__}: {error}"}
+
+    checked = iter(validate_grids(pairs))
+    return [reports[position] if position in reports else next(checked) for position in range(len(chunk))]
+
+def chunks(pairs, size):
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_execution(source, results_file=None, output=None, pattern="input_*.txt", workers=None):
+    # Returns True when every solution is valid
+    workers = workers or os.cpu_count() or 1
+    skipped = []
+    pairs = result_pairs(source, results_file, pattern, skipped) if results_file else directory_pairs(source, pattern)
+    out = open(output, "w") if output else None
+
+    valid = invalid = cells = 0
+    start_time = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for reports in executor.map(validate_chunk, chunks(pairs, PAIRS_PER_TASK)):
+                for report in reports:
+                    cells += report["cells"]
+                    if report["valid"]:
+                        valid += 1
+                    else:
+                        invalid += 1
+                        display_validation_report(report)
+                    if out:
+                        out.write(json.dumps(report) + "\n")
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.time() - start_time
+    skipped_text = f", {len(skipped)} without a solution skipped" if skipped else ""
+    print(f"Validated {valid + invalid} solutions ({valid} valid, {invalid} invalid{skipped_text}), {cells} cells "
+          f"in {elapsed:.2f}(s) ({cells / elapsed if elapsed else 0:.0f} cells/s) with {workers} workers")
+
+    return invalid == 0
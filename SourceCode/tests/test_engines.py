@@ -0,0 +1,136 @@
+import glob
+import os
+import random
+import pytest
+from Data.DataHandler import fill_result
+from Data.DataHandler import load_grid
+from Data.Grid import Grid
+from Data.Grid import TRAP
+from Data.Grid import UNKNOWN
+from Tasks.Backtracking import dpll_SAT
+from Tasks.Backtracking import new_search_stats
+from Tasks.CDCL import cdcl_SAT
+from Tasks.CNFs_Generation import generate_CNF_s
+from Tasks.ModelCounter import trap_probabilities
+
+pytest.importorskip("pysat")
+from Tasks.PySat import pysat_SAT
+from Tasks.PySat import pysat_uniqueness
+from Tasks.PySat import pysat_enumerate
+
+# Every engine is checked against pysat: the same answer, and a model that really holds
+TESTCASES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          "testcases", "input_*.txt")))
+
+# Boards small enough for pysat to list every solution
+ENUMERATION_LIMIT = 1 << 12
+
+def random_cnfs(rng, count):
+    # 3-SAT-like CNFs around the satisfiability threshold, so both answers show up
+    cnfs = []
+    for _ in range(count):
+        variables = rng.randint(1, 12)
+        clauses = []
+        for _ in range(rng.randint(0, 5 * variables)):
+            size = rng.randint(1, min(3, variables))
+            clauses.append([var if rng.random() < 0.5 else -var for var in rng.sample(range(1, variables + 1), size)])
+        cnfs.append(clauses)
+    return cnfs
+
+def random_boards(rng, count):
+    # Hints revealed from a random trap layout, one in three with a hint changed so the
+    # board may have no solution; a few traps are written in as 'T'
+    boards = []
+    for _ in range(count):
+        rows, cols = rng.randint(1, 4), rng.randint(1, 4)
+        traps = [rng.random() < 0.3 for _ in range(rows * cols)]
+        grid = Grid(rows, cols, bytearray(b'_' * (rows * cols)))
+
+        for index in range(rows * cols):
+            if traps[index]:
+                if rng.random() < 0.2:
+                    grid.cells[index] = TRAP
+            elif rng.random() < 0.5:
+                grid.cells[index] = ord(str(sum(traps[neighbour] for neighbour in grid.neighbours(index))))
+
+        hints = [index for index in range(rows * cols) if grid.is_hint(index)]
+        if hints and rng.random() < 0.3:
+            grid.cells[rng.choice(hints)] = ord(str(rng.randint(0, 8)))
+        boards.append(grid)
+    return boards
+
+def satisfies(cnfs, model):
+    true_literals = set(model)
+    return all(any(lit in true_literals for lit in clause) for clause in cnfs)
+
+def hints_hold(grid, solved_grid):
+    return all(solved_grid.cells[index] != UNKNOWN for index in range(len(grid.cells))) and \
+        all(sum(solved_grid.cells[neighbour] == TRAP for neighbour in grid.neighbours(index)) == grid.hint(index)
+            for index in range(len(grid.cells)) if grid.is_hint(index))
+
+def boards():
+    return [load_grid(filename) for filename in TESTCASES] + random_boards(random.Random(1), 150)
+
+def cnfs_cases():
+    return [generate_CNF_s(grid) for grid in boards()] + random_cnfs(random.Random(2), 300)
+
+@pytest.mark.parametrize("engine", ["dpll", "cdcl"])
+def test_engine_agrees_with_pysat(engine):
+    for cnfs in cnfs_cases():
+        if engine == "dpll":
+            model, solvable = dpll_SAT(cnfs, new_search_stats())
+        else:
+            model, solvable = cdcl_SAT(cnfs, new_search_stats())
+
+        _, expected = pysat_SAT(cnfs)
+        assert solvable == expected, cnfs
+        if solvable:
+            assert satisfies(cnfs, model), cnfs
+
+def test_bitmask_agrees_with_pysat():
+    pytest.importorskip("numpy")
+    from Tasks.Bitmask import bitmask_SAT
+
+    for grid in boards():
+        model, solvable = bitmask_SAT(grid, workers=1)
+
+        _, expected = pysat_SAT(generate_CNF_s(grid))
+        assert solvable == expected, grid.to_rows()
+        if solvable:
+            assert hints_hold(grid, fill_result(grid, model)), grid.to_rows()
+
+def test_model_counter_agrees_with_pysat():
+    rng = random.Random(3)
+    for grid in boards():
+        solutions = list(pysat_enumerate(grid, generate_CNF_s(grid), ENUMERATION_LIMIT))
+        assert len(solutions) < ENUMERATION_LIMIT
+
+        total_traps = [solution.count(chr(TRAP)) for solution in solutions]
+        for traps in (None, rng.choice(total_traps) if solutions else 0):
+            matching = [solution for solution, count in zip(solutions, total_traps) if traps is None or count == traps]
+            probabilities, total, _ = trap_probabilities(grid, traps)
+
+            assert total == len(matching), grid.to_rows()
+            if not matching:
+                assert probabilities is None
+                continue
+            for index, probability in probabilities.items():
+                trapped = sum(solution.cells[index] == TRAP for solution in matching)
+                assert probability == pytest.approx(trapped / len(matching)), grid.to_rows()
+
+def test_unique_counts_blanks_no_hint_touches():
+    # The hint fixes the middle cell; the far cell is free, so there are two solutions
+    grid = Grid.from_text(b"0, _, _\n")
+    unique, _, _ = pysat_uniqueness(grid, generate_CNF_s(grid))
+    assert unique is False
+
+    grid = Grid.from_text(b"0, _\n")
+    unique, _, _ = pysat_uniqueness(grid, generate_CNF_s(grid))
+    assert unique is True
+
+def test_enumerate_counts_blanks_no_hint_touches():
+    # One trap among the corner's 3 neighbours, the other 5 blanks free: 3 * 2^5 solutions
+    grid = Grid.from_text(b"1, _, _\n_, _, _\n_, _, _\n")
+    solutions = list(pysat_enumerate(grid, generate_CNF_s(grid), 1000))
+    assert len(solutions) == 96
+    assert len({bytes(solution.cells) for solution in solutions}) == 96